@@ -1,5 +1,7 @@
 import os
+import sys
 from pathlib import Path
+from urllib.parse import urlsplit
 import dj_database_url
 from celery.schedules import crontab
 from dotenv import load_dotenv
@@ -70,13 +72,57 @@ TEMPLATES = [
     },
 ]
 
+# Run on every new SQLite connection. WAL lets readers work while a writer
+# commits; synchronous=NORMAL is crash-safe under WAL and skips an fsync per
+# commit; mmap and a 64 MB page cache keep hot pages in memory.
+SQLITE_INIT_COMMAND = ';'.join([
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA mmap_size=268435456',  # 256 MB
+    'PRAGMA cache_size=-65536',    # in KiB
+    'PRAGMA temp_store=MEMORY',
+])
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # busy_timeout: wait up to 20s for another writer instead of failing with "database is locked"
+            'timeout': 20,
+            # Take the write lock at BEGIN, so a transaction that reads before
+            # writing can't deadlock with another one and fail without waiting
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': SQLITE_INIT_COMMAND,
+        },
     }
 }
 
+# --- READ REPLICAS ---
+# Comma-separated URLs of read-only copies of the default database. Public
+# (portech) GET views and broadcast audience lookups read from them; see
+# users/routers.py. To try it locally with two SQLite files:
+#   cp db.sqlite3 replica.sqlite3
+#   REPLICA_DATABASE_URLS=sqlite:///replica.sqlite3
+DATABASE_REPLICAS = []
+_replica_urls = os.environ.get('REPLICA_DATABASE_URLS') or os.environ.get('REPLICA_DATABASE_URL', '')
+for _number, _url in enumerate(filter(None, map(str.strip, _replica_urls.split(','))), start=1):
+    DATABASES[f'replica{_number}'] = {
+        **dj_database_url.parse(_url, conn_max_age=600),
+        'TEST': {'MIRROR': 'default'},  # Tests read their writes back through the one test DB
+    }
+    DATABASE_REPLICAS.append(f'replica{_number}')
+
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ['users.routers.ReplicaRouter']
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('django.contrib.auth.middleware.AuthenticationMiddleware') + 1,
+        'users.middleware.ReplicaRoutingMiddleware',
+    )
+REPLICA_READ_NAMESPACES = ['portech']
+# How long a client stays on the primary after writing (and everyone after a content save)
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 10))
+
     
 # --- DATABASE CONFIGURATION ---
 # DATABASES = {
@@ -135,8 +181,89 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'users.tasks.check_scheduled_broadcasts',
         'schedule': crontab(minute='*'),
     },
+    # SQLite upkeep (no-ops on other databases)
+    'sqlite-optimize-hourly': {
+        'task': 'users.tasks.optimize_database',
+        'schedule': crontab(minute=17),
+    },
+    'sqlite-analyze-weekly': {
+        'task': 'users.tasks.optimize_database',
+        'schedule': crontab(minute=40, hour=3, day_of_week='sun'),
+        'kwargs': {'full': True},
+    },
+    'sqlite-checkpoint-every-5-minutes': {
+        'task': 'users.tasks.checkpoint_database',
+        'schedule': crontab(minute='*/5'),
+    },
+    'sqlite-checkpoint-truncate-nightly': {
+        'task': 'users.tasks.checkpoint_database',
+        'schedule': crontab(minute=50, hour=3),
+        'kwargs': {'mode': 'TRUNCATE'},
+    },
 }
 
+# --- CACHING ---
+# The content/section/settings/permission versions in users/cache.py only work
+# if every gunicorn worker and Celery share one cache, so it lives in Redis
+# next to the Celery broker, but in its own database (CACHE_URL, by default
+# database 1 of REDIS_URL): cache.clear() flushes the whole database and must
+# never take queued tasks with it. The test runner gets a per-process memory
+# cache, as does LOCAL_MEMORY_CACHE=True for a single-process `runserver`
+# without Redis; never use that with several workers, or saves in one worker
+# won't invalidate the others.
+TESTING = sys.argv[1:2] == ['test']
+CACHE_URL = os.environ.get('CACHE_URL') or urlsplit(CELERY_BROKER_URL)._replace(path='/1').geturl()
+if TESTING or os.environ.get('LOCAL_MEMORY_CACHE') == 'True':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'KEY_PREFIX': 'bgtech',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+            'KEY_PREFIX': 'bgtech',
+        }
+    }
+# Public search responses (portech.views.SearchAPI): one entry per distinct
+# query, so they get a small bounded cache of their own and can't push the
+# version keys and pages out of the shared one. Keys carry the shared
+# content version, so a per-process copy still goes stale on every save.
+CACHES['search'] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'search',
+    'TIMEOUT': 60 * 10,
+    'OPTIONS': {'MAX_ENTRIES': 1000},
+}
+
+# Public portech pages are cached until the next content edit; this is only the upper bound
+PORTECH_PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Serve Home/About/Services from their async variants (run under ASGI, BGTECH/asgi.py).
+# Compare with `python manage.py bench_pages` before switching.
+PORTECH_ASYNC_VIEWS = os.environ.get('PORTECH_ASYNC_VIEWS') == 'True'
+
+# Stream public pages section by section (portech/streaming.py) instead of
+# sending them once fully rendered. Cache hits are still sent whole. WSGI only:
+# Django's ASGI handler buffers sync streams before sending them.
+PORTECH_STREAM_PAGES = os.environ.get('PORTECH_STREAM_PAGES') == 'True'
+
+# Browsers/CDNs may reuse public JSON API responses this long before revalidating with the ETag
+PORTECH_API_CACHE_SECONDS = 60
+
+# --- PRE-RENDERED PAGES ---
+# `python manage.py build_static_site` writes the public pages here as
+# <path>/index.html. Set SERVE_PRERENDERED=True to let whitenoise answer those
+# URLs before Django runs. Whitenoise indexes files at startup, so restart the
+# web process after a build that adds or resizes pages.
+PORTECH_STATIC_BUILD_DIR = BASE_DIR / 'prerendered'
+if os.environ.get('SERVE_PRERENDERED') == 'True':
+    WHITENOISE_ROOT = PORTECH_STATIC_BUILD_DIR
+    WHITENOISE_INDEX_FILE = True
+
 # --- EMAIL SETTINGS ---
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
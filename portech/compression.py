@@ -0,0 +1,65 @@
+import re
+from django.utils.regex_helper import _lazy_re_compile
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # Optional: without it pages are cached as gzip + identity only
+    brotli = None
+
+
+# Blocks whose whitespace is significant (or not HTML at all) are left untouched
+PRESERVED_BLOCKS = re.compile(r'(<(pre|textarea|script|style)\b.*?</\2\s*>)', re.IGNORECASE | re.DOTALL)
+# Comments, except IE conditional comments
+HTML_COMMENTS = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+WHITESPACE = re.compile(r'\s+')
+
+re_accepts_br = _lazy_re_compile(r'\bbr\b')
+re_accepts_gzip = _lazy_re_compile(r'\bgzip\b')
+
+
+def _collapse(match):
+    # Keep a line break where there was one, so the source stays readable
+    return '\n' if '\n' in match.group() else ' '
+
+
+def minify_html(html):
+    """
+    Drop comments and collapse runs of whitespace to a single space/newline.
+    Never removes whitespace outright, since it separates inline elements.
+    """
+    parts = PRESERVED_BLOCKS.split(html)
+    out = []
+    # split() yields: text, whole preserved block, tag name, text, ...
+    for i in range(0, len(parts), 3):
+        out.append(WHITESPACE.sub(_collapse, HTML_COMMENTS.sub('', parts[i])))
+        if i + 1 < len(parts):
+            out.append(parts[i + 1])
+    return ''.join(out).strip()
+
+
+def build_variants(content, content_type, charset='utf-8'):
+    """
+    Return the page as {'content_type', 'identity', 'gzip'[, 'br']}: minified
+    once and compressed once at cache time, so hits only pick a variant.
+    """
+    if content_type.startswith('text/html'):
+        content = minify_html(content.decode(charset)).encode(charset)
+
+    variants = {'content_type': content_type, 'identity': content}
+    gzipped = compress_string(content)
+    if len(gzipped) < len(content):
+        variants['gzip'] = gzipped
+    if brotli is not None:
+        variants['br'] = brotli.compress(content, mode=brotli.MODE_TEXT)
+    return variants
+
+
+def pick_encoding(request, variants):
+    """Best stored encoding the client accepts: br, then gzip, then identity."""
+    accept = request.headers.get('Accept-Encoding', '')
+    if 'br' in variants and re_accepts_br.search(accept):
+        return 'br'
+    if 'gzip' in variants and re_accepts_gzip.search(accept):
+        return 'gzip'
+    return 'identity'
@@ -0,0 +1,108 @@
+import asyncio
+import statistics
+import threading
+import time
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+
+
+# A private cache for the run, so --cold never clears the site's real cache
+BENCH_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bench-pages',
+    }
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark public pages through Django's WSGI handler (threads) and "
+        "ASGI handler (one event loop) in-process, reporting requests/sec and "
+        "p50/p95 latency. Run once with PORTECH_ASYNC_VIEWS=True and once "
+        "without to compare the async page variants against the sync ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', default=['/', '/about/', '/services/'])
+        parser.add_argument('--requests', type=int, default=200, help="Requests per path and handler.")
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--handler', choices=['wsgi', 'asgi', 'both'], default='both')
+        parser.add_argument('--cold', action='store_true', help="Clear the cache before every request (full render path).")
+        parser.add_argument('--host', default='localhost', help="Host header to send (must be in ALLOWED_HOSTS).")
+
+    def handle(self, *args, **options):
+        handlers = ['wsgi', 'asgi'] if options['handler'] == 'both' else [options['handler']]
+        with override_settings(CACHES=BENCH_CACHES):
+            for path in options['paths']:
+                for handler in handlers:
+                    run = self.run_wsgi if handler == 'wsgi' else self.run_asgi
+                    elapsed, latencies = run(path, options)
+                    self.report(handler, path, elapsed, latencies)
+
+    def fetch(self, client, path, cold):
+        if cold:
+            cache.clear()
+        start = time.perf_counter()
+        response = client.get(path, secure=True)
+        return response.status_code, time.perf_counter() - start
+
+    def run_wsgi(self, path, options):
+        latencies, errors = [], []
+        per_thread = max(1, options['requests'] // options['concurrency'])
+
+        def worker():
+            client = Client(headers={'host': options['host']})
+            try:
+                for _ in range(per_thread):
+                    status, took = self.fetch(client, path, options['cold'])
+                    (latencies if status == 200 else errors).append(took)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['concurrency'])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.warn_errors(path, errors)
+        return time.perf_counter() - start, latencies
+
+    def run_asgi(self, path, options):
+        latencies, errors = [], []
+
+        async def one(client, gate):
+            async with gate:
+                if options['cold']:
+                    cache.clear()
+                start = time.perf_counter()
+                response = await client.get(path, secure=True)
+                (latencies if response.status_code == 200 else errors).append(time.perf_counter() - start)
+
+        async def main():
+            client = AsyncClient(headers={'host': options['host']})
+            gate = asyncio.Semaphore(options['concurrency'])
+            total = max(1, options['requests'] // options['concurrency']) * options['concurrency']
+            await asyncio.gather(*(one(client, gate) for _ in range(total)))
+
+        start = time.perf_counter()
+        asyncio.run(main())
+        self.warn_errors(path, errors)
+        return time.perf_counter() - start, latencies
+
+    def warn_errors(self, path, errors):
+        if errors:
+            self.stderr.write(self.style.WARNING(f"{path}: {len(errors)} non-200 response(s) left out of the figures"))
+
+    def report(self, handler, path, elapsed, latencies):
+        if len(latencies) < 2:
+            self.stdout.write(f"{handler:5} {path:12} not enough successful requests")
+            return
+        cuts = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f"{handler:5} {path:12} {len(latencies) / elapsed:8.1f} req/s   "
+            f"p50 {cuts[49] * 1000:7.1f} ms   p95 {cuts[94] * 1000:7.1f} ms"
+        )
@@ -0,0 +1,136 @@
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+from users.models import CategoryPost, ExternalSubscriber
+
+
+# Django's stock SQLite setup: rollback journal, deferred transactions, 5s busy timeout
+DEFAULT_PROFILE = {}
+
+
+def run_worker(role, db_path, options, seconds, post_ids, category_ids, results):
+    """
+    One process standing in for a gunicorn worker: its own connection to the
+    benchmark copy, doing writer or reader requests until the time is up.
+    """
+    connection = connections['default']
+    connection.settings_dict = {**connection.settings_dict, 'NAME': db_path, 'OPTIONS': dict(options)}
+    rng = random.Random(os.getpid())
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            if role == 'writer':
+                write_once(rng, post_ids)
+            else:
+                read_once(rng, category_ids)
+        except OperationalError:  # "database is locked"
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+    connections.close_all()
+    results.put((role, latencies, errors))
+
+
+def write_once(rng, post_ids):
+    if rng.random() < 0.5:
+        # Subscriber signup, as in portech.views.External: check, then insert
+        email = f'bench-{os.getpid()}-{time.perf_counter_ns()}@example.com'
+        with transaction.atomic():
+            if not ExternalSubscriber.objects.filter(email=email).exists():
+                ExternalSubscriber.objects.create(email=email)
+    else:
+        # Admin save: load the row, then write it back in the same transaction
+        pk = rng.choice(post_ids)
+        with transaction.atomic():
+            post = CategoryPost.objects.only('excerpt').get(pk=pk)
+            CategoryPost.objects.filter(pk=pk).update(excerpt=(post.excerpt or '')[:200] + '.')
+
+
+def read_once(rng, category_ids):
+    posts = CategoryPost.objects.filter(category_id=rng.choice(category_ids), is_published=True)
+    list(posts.order_by('-created_at')[:20])
+    posts.count()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark concurrent SQLite writers (admin saves, subscriber signups) "
+        "and readers (post listings) in separate processes, the way gunicorn "
+        "workers share db.sqlite3. Runs on a copy of the database, once with "
+        "Django's default SQLite settings and once with DATABASES['default']['OPTIONS'], "
+        "reporting throughput, latency and 'database is locked' failures."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--profile', choices=['default', 'tuned', 'both'], default='both')
+
+    def handle(self, *args, **options):
+        database = settings.DATABASES['default']
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError("The default database isn't SQLite.")
+        post_ids = list(CategoryPost.objects.values_list('pk', flat=True))
+        category_ids = list(CategoryPost.objects.values_list('category_id', flat=True).distinct())
+        if not post_ids:
+            raise CommandError("Needs at least one CategoryPost to write to.")
+
+        profiles = {'default': DEFAULT_PROFILE, 'tuned': database.get('OPTIONS', {})}
+        names = ['default', 'tuned'] if options['profile'] == 'both' else [options['profile']]
+        workdir = tempfile.mkdtemp(prefix='bench-sqlite-')
+        try:
+            for name in names:
+                db_path = self.copy_database(database['NAME'], workdir, name)
+                self.report(name, self.run_profile(db_path, profiles[name], options, post_ids, category_ids), options['seconds'])
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def copy_database(self, source, workdir, name):
+        # backup() gives a consistent copy even while the live DB is in use
+        path = os.path.join(workdir, f'{name}.sqlite3')
+        with sqlite3.connect(source) as src, sqlite3.connect(path) as dst:
+            src.backup(dst)
+            # Start both runs from the stock journal; the tuned profile switches itself to WAL
+            dst.execute('PRAGMA journal_mode=DELETE')
+        return path
+
+    def run_profile(self, db_path, profile, options, post_ids, category_ids):
+        # Children must not inherit an open connection
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        roles = ['writer'] * options['writers'] + ['reader'] * options['readers']
+        workers = [
+            context.Process(target=run_worker, args=(role, db_path, profile, options['seconds'], post_ids, category_ids, results))
+            for role in roles
+        ]
+        for worker in workers:
+            worker.start()
+        collected = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        return collected
+
+    def report(self, name, collected, seconds):
+        for role in ('writer', 'reader'):
+            latencies = [took for r, times, _ in collected if r == role for took in times]
+            errors = sum(errors for r, _, errors in collected if r == role)
+            if len(latencies) < 2:
+                self.stdout.write(f"{name:8} {role}s: {len(latencies)} ok, {errors} locked")
+                continue
+            cuts = statistics.quantiles(latencies, n=100)
+            self.stdout.write(
+                f"{name:8} {role}s: {len(latencies) / seconds:8.1f} ops/s   "
+                f"p50 {cuts[49] * 1000:7.1f} ms   p95 {cuts[94] * 1000:7.1f} ms   {errors} locked"
+            )
@@ -0,0 +1,75 @@
+import json
+import os
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import resolve, reverse
+from portech.sections import section_validators
+
+
+# Every public page that renders the same HTML for every visitor
+PAGES = ['home', 'about', 'services', 'blog', 'portfolio', 'contact']
+MANIFEST_NAME = '.build-manifest.json'
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the public portech pages to static HTML under "
+        "PORTECH_STATIC_BUILD_DIR so whitenoise can serve them without Django."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help="Build directory (defaults to settings.PORTECH_STATIC_BUILD_DIR).")
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help="Only re-render pages whose categories/widgets or site settings changed since the last build.",
+        )
+        parser.add_argument('--host', default='localhost', help="Host header to render with (must be in ALLOWED_HOSTS).")
+
+    def handle(self, *args, **options):
+        build_dir = Path(options['output'] or settings.PORTECH_STATIC_BUILD_DIR)
+        build_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = build_dir / MANIFEST_NAME
+        manifest = self.read_manifest(manifest_path) if options['incremental'] else {}
+
+        client = Client(HTTP_HOST=options['host'])
+        built = skipped = 0
+        for name in PAGES:
+            path = reverse(f'portech:{name}')
+            target = build_dir / path.lstrip('/') / 'index.html'
+
+            # Same validator the live view sends as its ETag: it moves whenever
+            # a section's updated_at, its published rows or a site setting change.
+            view = resolve(path).func.view_class
+            etag, _ = section_validators(view.category_sections, view.widget_sections)
+            if manifest.get(path) == etag and target.exists():
+                skipped += 1
+                continue
+
+            response = client.get(path, secure=True)
+            if response.status_code != 200:
+                raise CommandError(f"{path} returned {response.status_code}; build stopped.")
+
+            # PORTECH_STREAM_PAGES turns the pages into StreamingHttpResponses
+            content = b''.join(response.streaming_content) if response.streaming else response.content
+            self.write_atomic(target, content)
+            manifest[path] = etag
+            built += 1
+            self.stdout.write(f"  {path} -> {target}")
+
+        self.write_atomic(manifest_path, json.dumps(manifest, indent=2).encode())
+        self.stdout.write(self.style.SUCCESS(f"Built {built} page(s), {skipped} unchanged, in {build_dir}"))
+
+    def read_manifest(self, manifest_path):
+        try:
+            return json.loads(manifest_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def write_atomic(self, target, content):
+        # Write then rename, so whitenoise never serves a half-written page
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + '.tmp')
+        tmp.write_bytes(content)
+        os.replace(tmp, target)
@@ -0,0 +1,190 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from users.cache import get_content_version, record_stat
+from .compression import build_variants, pick_encoding
+from .sections import aload_sections, section_validators
+from .streaming import stream_template
+
+
+def page_cache_key(request):
+    # Query strings (utm_* etc.) don't change what these pages render
+    return f'html:{get_content_version()}:{request.path}'
+
+
+class CachedPageMixin:
+    """
+    Serve anonymous GET/HEAD requests for public pages straight from the cache.
+    Keys carry the global content version, so the next editor save retires
+    every cached page (see users/signals.py).
+    Pages are stored minified, with gzip/brotli copies made once at store
+    time; each request just picks the encoding it accepts.
+    """
+    page_cache_timeout = None  # Falls back to settings.PORTECH_PAGE_CACHE_TIMEOUT
+
+    def is_page_cacheable(self, request, user=None):
+        if user is None:
+            user = request.user
+        return request.method in ('GET', 'HEAD') and not user.is_authenticated
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.view_is_async:
+            return self._async_cached_dispatch(request, *args, **kwargs)
+        if not self.is_page_cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        key, response = self.get_cached_page(request)
+        if response is None:
+            response = self.cache_page(key, super().dispatch(request, *args, **kwargs))
+        return response
+
+    async def _async_cached_dispatch(self, request, *args, **kwargs):
+        # request.user loads the session and user synchronously; not allowed on the event loop
+        user = await request.auser() if request.method in ('GET', 'HEAD') else None
+        if user is None or not self.is_page_cacheable(request, user):
+            return await super().dispatch(request, *args, **kwargs)
+
+        key, response = await sync_to_async(self.get_cached_page)(request)
+        if response is None:
+            response = self.cache_page(key, await super().dispatch(request, *args, **kwargs))
+        return response
+
+    def get_cached_page(self, request):
+        """Return (cache key, cached response or None)."""
+        key = page_cache_key(request)
+        variants = cache.get(key)
+        if variants is None:
+            record_stat('page', 'misses')
+            return key, None
+
+        record_stat('page', 'hits')
+        response = HttpResponse(content_type=variants['content_type'])
+        self.serve_variant(response, variants)
+        response['X-Page-Cache'] = 'hit'
+        return key, response
+
+    def cache_page(self, key, response):
+        if response.status_code != 200:
+            return response
+
+        response['X-Page-Cache'] = 'miss'
+        patch_vary_headers(response, ['Accept-Encoding'])
+        if response.streaming:
+            # Already on its way out unminified; later hits get the stored variants
+            response.streaming_content = self.store_streamed_page(key, response, response.streaming_content)
+        elif hasattr(response, 'add_post_render_callback'):
+            # TemplateResponse: content only exists once the handler renders it
+            response.add_post_render_callback(lambda rendered: self.serve_variant(rendered, self.store_page(key, rendered)))
+        else:
+            self.serve_variant(response, self.store_page(key, response))
+        return response
+
+    def serve_variant(self, response, variants):
+        encoding = pick_encoding(self.request, variants)
+        response.content = variants[encoding]
+        if encoding != 'identity':
+            response['Content-Encoding'] = encoding
+        patch_vary_headers(response, ['Accept-Encoding'])
+
+    def store_page(self, key, response, content=None):
+        timeout = self.page_cache_timeout
+        if timeout is None:
+            timeout = getattr(settings, 'PORTECH_PAGE_CACHE_TIMEOUT', 60 * 60 * 24)
+        if content is None:
+            content = response.content
+        variants = build_variants(content, response['Content-Type'], response.charset)
+        cache.set(key, variants, timeout)
+        return variants
+
+    def store_streamed_page(self, key, response, streaming_content):
+        # Pass chunks through untouched; cache the page only if the client
+        # read it to the end (a dropped connection leaves a partial body)
+        chunks = []
+        for chunk in streaming_content:
+            chunks.append(chunk)
+            yield chunk
+        self.store_page(key, response, b''.join(chunks))
+
+
+class ConditionalPageMixin:
+    """
+    Answer If-None-Match / If-Modified-Since with 304 before any rendering.
+    Validators come from the updated_at stamps of the view's
+    category_sections/widget_sections plus AppVariable.lastupdated, and are
+    cached per content version so repeat checks cost no queries.
+    """
+    category_sections = []
+    widget_sections = []
+
+    def get_page_validators(self):
+        key = f'validators:{get_content_version()}:{self.request.path}'
+        validators = cache.get(key)
+        if validators is None:
+            validators = section_validators(self.category_sections, self.widget_sections)
+            cache.set(key, validators, getattr(settings, 'PORTECH_PAGE_CACHE_TIMEOUT', 60 * 60 * 24))
+        return validators
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        if self.view_is_async:
+            return self._async_conditional_dispatch(request, *args, **kwargs)
+
+        etag, last_modified = self.get_page_validators()
+        response = self.get_not_modified(request, etag, last_modified)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+        return self.add_validators(response, etag, last_modified)
+
+    async def _async_conditional_dispatch(self, request, *args, **kwargs):
+        etag, last_modified = await sync_to_async(self.get_page_validators)()
+        response = self.get_not_modified(request, etag, last_modified)
+        if response is None:
+            response = await super().dispatch(request, *args, **kwargs)
+        return self.add_validators(response, etag, last_modified)
+
+    def get_not_modified(self, request, etag, last_modified):
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+        return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    def add_validators(self, response, etag, last_modified):
+        if response.status_code not in (200, 304):
+            return response
+
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(int(last_modified.timestamp()))
+        # Let browsers and proxies keep the body, but revalidate it on every use
+        patch_cache_control(response, no_cache=True)
+        return response
+
+
+class StreamingPageMixin:
+    """
+    With settings.PORTECH_STREAM_PAGES on, send the page while it renders
+    (portech/streaming.py) so the <head> and above-the-fold markup reach the
+    browser before the lower sections have run their queries.
+    """
+    def render_to_response(self, context, **response_kwargs):
+        if not getattr(settings, 'PORTECH_STREAM_PAGES', False):
+            return super().render_to_response(context, **response_kwargs)
+        response_kwargs.setdefault('content_type', self.content_type)
+        chunks = stream_template(self.get_template_names(), context, self.request)
+        return StreamingHttpResponse(chunks, **response_kwargs)
+
+
+class AsyncSectionsMixin:
+    """
+    Async GET for a page built from category_sections/widget_sections: the
+    sections are fetched with aload_sections() before rendering, and the
+    template then renders off the event loop like any TemplateResponse.
+    Put it first in the bases of a sync page class that reads its sections
+    through get_sections().
+    """
+    async def get(self, request, *args, **kwargs):
+        self.sections = await aload_sections(self.category_sections, self.widget_sections)
+        context = self.get_context_data(**kwargs)
+        return self.render_to_response(context)
@@ -0,0 +1,194 @@
+import asyncio
+import hashlib
+from collections import namedtuple
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.functional import SimpleLazyObject
+from users.cache import get_content_version, get_section_versions
+from users.models import SECTION_MODELS, AppVariable, Category, CategoryPost, PublishedSection, Widget, WidgetPost
+
+
+# A parent (Category/Widget) and its published posts, in display order.
+Section = namedtuple('Section', ['parent', 'posts'])
+
+EMPTY_SECTION = Section(parent=None, posts=[])
+
+
+class SectionSet:
+    """
+    Published posts and parent rows for several categories/widgets, read
+    together on first access from their PublishedSection snapshots (live
+    tables only for sections whose snapshot is missing or out of date).
+
+    category()/widget() hand back lazy placeholders, so a template whose
+    {% cache_section %} fragments are all cached never runs the queries.
+    """
+
+    def __init__(self, category_slugs=(), widget_slugs=()):
+        self.category_slugs = list(category_slugs)
+        self.widget_slugs = list(widget_slugs)
+        self._categories = None
+        self._widgets = None
+
+    def _load(self):
+        if self._categories is None:
+            self._categories, self._widgets = _load_snapshots(self.category_slugs, self.widget_slugs)
+
+    def provides(self, kind, slug):
+        """Whether ('category' | 'widget', slug) is one of the sections this set loads."""
+        return slug in (self.category_slugs if kind == 'category' else self.widget_slugs)
+
+    def get(self, kind, slug):
+        """The loaded Section for ('category' | 'widget', slug)."""
+        self._load()
+        sections = self._categories if kind == 'category' else self._widgets
+        return sections.get(slug, EMPTY_SECTION)
+
+    def _lazy(self, kind, slug):
+        return Section(
+            parent=SimpleLazyObject(lambda: self.get(kind, slug).parent),
+            posts=SimpleLazyObject(lambda: self.get(kind, slug).posts),
+        )
+
+    def category(self, slug):
+        return self._lazy('category', slug)
+
+    def widget(self, slug):
+        return self._lazy('widget', slug)
+
+
+def _load_snapshots(category_slugs, widget_slugs):
+    """
+    Return ({slug: Section} for categories, same for widgets) from one
+    PublishedSection query. Sections without a current snapshot are read
+    live and their snapshot is rebuilt from those rows.
+    """
+    wanted = [('category', slug) for slug in category_slugs] + [('widget', slug) for slug in widget_slugs]
+    versions = get_section_versions(wanted)
+    snapshots = PublishedSection.objects.in_bulk([PublishedSection.make_key(*section) for section in wanted])
+
+    loaded = {'category': {}, 'widget': {}}
+    stale = {'category': [], 'widget': []}
+    for kind, slug in wanted:
+        snapshot = snapshots.get(PublishedSection.make_key(kind, slug))
+        if snapshot is not None and snapshot.version == versions[(kind, slug)]:
+            loaded[kind][slug] = Section(*snapshot.hydrate())
+        else:
+            stale[kind].append(slug)
+
+    rebuilt = []
+    for kind, slugs in stale.items():
+        if not slugs:
+            continue
+        parent_model, post_model = SECTION_MODELS[kind]
+        live = _group_sections(parent_model, post_model, kind, slugs)
+        for slug, section in live.items():
+            # Stamped with the version read *before* the live query, so an edit
+            # committed meanwhile makes this snapshot stale again at once
+            rebuilt.append(PublishedSection.snapshot(kind, section.parent, section.posts, versions[(kind, slug)]))
+        loaded[kind].update(live)
+    # Every stale section of the page in one write
+    PublishedSection.store_all(rebuilt)
+
+    return loaded['category'], loaded['widget']
+
+
+def _group_sections(parent_model, post_model, parent_field, slugs):
+    """
+    One query for the parents, one for their published posts. Posts come from
+    for_display(), so only the columns each parent's child_fields enable load.
+    """
+    if not slugs:
+        return {}
+
+    parents = list(parent_model.objects.live().filter(slug__in=slugs))
+    posts = post_model.objects.for_display(*parents).filter(is_published=True) if parents else []
+    return _collect_sections(parents, posts, parent_field)
+
+
+async def _agroup_sections(parent_model, post_model, parent_field, slugs):
+    """Async ORM version of _group_sections()."""
+    if not slugs:
+        return {}
+
+    parents = [parent async for parent in parent_model.objects.live().filter(slug__in=slugs)]
+    posts = []
+    if parents:
+        posts = [post async for post in post_model.objects.for_display(*parents).filter(is_published=True)]
+    return _collect_sections(parents, posts, parent_field)
+
+
+def _collect_sections(parents, posts, parent_field):
+    sections = {parent.slug: Section(parent, []) for parent in parents}
+    for post in posts:
+        sections[getattr(post, parent_field).slug].posts.append(post)
+    return sections
+
+
+def load_sections(category_slugs=(), widget_slugs=()):
+    """
+    Usage: sections = load_sections(['faq', 'our-team'], ['home-slider'])
+           sections.category('faq').posts / sections.category('faq').parent
+    Unknown slugs return an empty section instead of raising DoesNotExist.
+    """
+    return SectionSet(category_slugs, widget_slugs)
+
+
+async def aload_sections(category_slugs=(), widget_slugs=()):
+    """
+    Async load_sections(): categories and widgets are fetched concurrently
+    and the SectionSet comes back already loaded, so templates can read it
+    from sync code without touching the DB.
+    Django runs async ORM queries on one shared thread, so the win is the
+    event loop staying free for other requests, not parallel SQL.
+    """
+    sections = SectionSet(category_slugs, widget_slugs)
+    sections._categories, sections._widgets = await asyncio.gather(
+        _agroup_sections(Category, CategoryPost, 'category', sections.category_slugs),
+        _agroup_sections(Widget, WidgetPost, 'widget', sections.widget_slugs),
+    )
+    return sections
+
+
+def section_validators(category_slugs=(), widget_slugs=()):
+    """
+    Return (etag, last_modified) for a page built from these sections and the
+    site settings: newest updated_at plus row counts, so deleting or
+    unpublishing a post changes the ETag even when the newest stamp doesn't.
+    """
+    stamps = []
+    sources = [
+        (Category, CategoryPost, 'category', category_slugs),
+        (Widget, WidgetPost, 'widget', widget_slugs),
+    ]
+    for parent_model, post_model, parent_field, slugs in sources:
+        if not slugs:
+            continue
+        stamps.append(parent_model.objects.live().filter(slug__in=slugs).aggregate(last=Max('updated_at'), count=Count('id')))
+        stamps.append(post_model.objects.filter(
+            **{f'{parent_field}__slug__in': slugs, 'is_published': True}
+        ).aggregate(last=Max('updated_at'), count=Count('id')))
+    stamps.append(AppVariable.objects.aggregate(last=Max('lastupdated'), count=Count('id')))
+
+    fingerprint = '|'.join(f"{s['last'].isoformat() if s['last'] else '-'}:{s['count']}" for s in stamps)
+    etag = 'W/"%s"' % hashlib.md5(fingerprint.encode()).hexdigest()
+    last_modified = max((s['last'] for s in stamps if s['last']), default=None)
+    return etag, last_modified
+
+
+def live_section_slugs():
+    """
+    {'category': {slug, ...}, 'widget': {slug, ...}} of every live parent,
+    cached under the content version (which any Category/Widget save bumps).
+    Lets request-driven code skip slugs that name no section.
+    """
+    key = f'sections:slugs:{get_content_version()}'
+    slugs = cache.get(key)
+    if slugs is None:
+        slugs = {
+            kind: set(parent_model.objects.live().values_list('slug', flat=True))
+            for kind, (parent_model, post_model) in SECTION_MODELS.items()
+        }
+        cache.set(key, slugs, getattr(settings, 'PORTECH_PAGE_CACHE_TIMEOUT', 60 * 60 * 24))
+    return slugs
@@ -0,0 +1,84 @@
+from django.template import loader
+from django.template.base import TextNode
+from django.template.context import make_context
+from django.template.loader_tags import BLOCK_CONTEXT_KEY, BlockContext, BlockNode, ExtendsNode
+
+
+# Rendered HTML is held back until at least this much is ready, so the head and
+# navigation go out in one packet instead of a trickle of tiny chunks.
+STREAM_CHUNK_SIZE = 4096
+
+
+def stream_template(template_names, context=None, request=None):
+    """
+    Render a Django template as a generator of HTML chunks, in document order.
+    Walks {% extends %} / {% block %} the same way Template.render() does, but
+    yields between top-level nodes, so everything above a slow section (e.g.
+    <head>, the navbar) is flushed before that section runs its queries.
+    """
+    template = loader.select_template(template_names).template
+    context = make_context(context, request, autoescape=template.engine.autoescape)
+
+    buffer, size = [], 0
+    with context.render_context.push_state(template):
+        with context.bind_template(template):
+            context.template_name = template.name
+            for html in _render_template(template, context):
+                buffer.append(html)
+                size += len(html)
+                if size >= STREAM_CHUNK_SIZE:
+                    yield ''.join(buffer)
+                    buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _render_template(template, context):
+    # Mirrors ExtendsNode.render(): register this template's blocks, then
+    # render the parent in its place
+    extends = next((node for node in template.nodelist if not isinstance(node, TextNode)), None)
+    if not isinstance(extends, ExtendsNode):
+        yield from _render_nodes(template.nodelist, context)
+        return
+
+    parent = extends.get_parent(context)
+    if BLOCK_CONTEXT_KEY not in context.render_context:
+        context.render_context[BLOCK_CONTEXT_KEY] = BlockContext()
+    block_context = context.render_context[BLOCK_CONTEXT_KEY]
+    block_context.add_blocks(extends.blocks)
+
+    first = next((node for node in parent.nodelist if not isinstance(node, TextNode)), None)
+    if not isinstance(first, ExtendsNode):
+        block_context.add_blocks({node.name: node for node in parent.nodelist.get_nodes_by_type(BlockNode)})
+
+    with context.render_context.push_state(parent, isolated_context=False):
+        yield from _render_template(parent, context)
+
+
+def _render_nodes(nodelist, context):
+    for node in nodelist:
+        if isinstance(node, BlockNode):
+            yield from _render_block(node, context)
+        else:
+            yield node.render_annotated(context)
+
+
+def _render_block(node, context):
+    # Mirrors BlockNode.render(), descending into the block instead of
+    # rendering it as one string
+    block_context = context.render_context.get(BLOCK_CONTEXT_KEY)
+    with context.push():
+        if block_context is None:
+            context['block'] = node
+            yield from _render_nodes(node.nodelist, context)
+            return
+
+        push = block = block_context.pop(node.name)
+        if block is None:
+            block = node
+        block = type(node)(block.name, block.nodelist)
+        block.context = context
+        context['block'] = block
+        yield from _render_nodes(block.nodelist, context)
+        if push is not None:
+            block_context.push(node.name, push)
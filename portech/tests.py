@@ -1,3 +1,117 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from importlib import import_module
+from io import StringIO
+from pathlib import Path
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from users.cache import bump_content_version, section_version_key
+from users.models import Category, CategoryPost, CustomUser
+from users.search import hide_section
+from .views import AsyncAbout
 
-# Create your tests here.
+
+class AsyncPageCacheTests(TestCase):
+    """Async pages decide cacheability without touching the DB on the event loop."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(email='editor@example.com', username='editor', password='x')
+
+    def setUp(self):
+        cache.clear()
+
+    async def get_about(self, session_key=None):
+        request = AsyncRequestFactory().get('/about/')
+        request.session = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+        # Lazy request.user/auser(), as the middleware leaves them for the view
+        AuthenticationMiddleware(lambda request: None).process_request(request)
+        return await AsyncAbout.as_view()(request)
+
+    async def test_logged_in_visitor_bypasses_the_page_cache(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.get_about(self.async_client.session.session_key)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Page-Cache', response)
+
+    async def test_anonymous_visitor_uses_the_page_cache(self):
+        response = await self.get_about()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+
+
+class SectionBatchAPITests(TestCase):
+    """Made-up slugs are answered but never leave keys in the cache."""
+
+    def setUp(self):
+        cache.clear()
+        Category.objects.create(title='FAQ', child_fields=['title'])
+
+    def test_unknown_slugs_store_nothing(self):
+        response = self.client.get('/api/sections/?category=faq,no-such-section')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()['sections']['category:no-such-section'])
+        self.assertIsNotNone(cache.get(section_version_key('category', 'faq')))
+        self.assertIsNone(cache.get(section_version_key('category', 'no-such-section')))
+
+
+class SearchAPITests(TestCase):
+    """Public search caches per normalized query and hides sections being deleted."""
+
+    def setUp(self):
+        cache.clear()
+        caches['search'].clear()
+        self.faq = Category.objects.create(title='FAQ', child_fields=['title'])
+        self.old = Category.objects.create(title='Old News', child_fields=['title'])
+        CategoryPost.objects.create(title='Pricing plans', category=self.faq, is_published=True)
+        CategoryPost.objects.create(title='Pricing history', category=self.old, is_published=True)
+
+    def search(self, query):
+        return [post['title'] for post in self.client.get('/api/search/', {'q': query}).json()['results']]
+
+    def test_spelling_variants_share_one_entry(self):
+        self.search('pricing')
+        self.search('  PRICING ')
+        self.assertEqual(len(caches['search']._cache), 1)
+
+    def test_sections_pending_delete_are_hidden(self):
+        self.assertEqual(sorted(self.search('pricing')), ['Pricing history', 'Pricing plans'])
+        # What BackgroundDeleteMixin does before queueing delete_section
+        Category.objects.filter(pk=self.old.pk).update(is_pending_delete=True)
+        hide_section('category', self.old.pk)
+        bump_content_version()
+        self.assertEqual(self.search('pricing'), ['Pricing plans'])
+
+
+class SubscribeFormTests(TestCase):
+    """A rejected signup must not leave empty section fragments in the cache."""
+
+    def setUp(self):
+        cache.clear()
+        faq = Category.objects.create(title='FAQ', child_fields=['title', 'excerpt'])
+        CategoryPost.objects.create(title='How do refunds work', category=faq, is_published=True)
+
+    def test_invalid_email_redirects_and_caches_nothing(self):
+        response = self.client.post('/ExternalSubcrib/', {'email': 'not-an-email'})
+        self.assertRedirects(response, '/', fetch_redirect_response=False)
+        self.assertContains(self.client.get('/'), 'How do refunds work')
+
+
+class BuildStaticSiteTests(TestCase):
+    """The static build writes the same HTML whether or not pages stream."""
+
+    def setUp(self):
+        self.build_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.build_dir, ignore_errors=True)
+        faq = Category.objects.create(title='FAQ', child_fields=['title', 'excerpt'])
+        CategoryPost.objects.create(title='How do refunds work', category=faq, is_published=True)
+
+    @override_settings(PORTECH_STREAM_PAGES=True)
+    def test_streamed_pages_are_written_whole(self):
+        call_command('build_static_site', output=self.build_dir, stdout=StringIO())
+        page = Path(self.build_dir, 'index.html').read_text()
+        self.assertIn('How do refunds work', page)
+        self.assertTrue(page.rstrip().endswith('</html>'))
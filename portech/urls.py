@@ -1,16 +1,27 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 
 app_name = 'portech'
 
+# Async page variants only help under ASGI; under WSGI each request would pay for its own event loop
+if settings.PORTECH_ASYNC_VIEWS:
+    Index, About, Services = views.AsyncIndex, views.AsyncAbout, views.AsyncServices
+else:
+    Index, About, Services = views.Index, views.About, views.Services
+
 
 urlpatterns = [
-    path('', views.Index.as_view(), name='home'),
-    path('services/', views.Services.as_view(), name='services'),
+    path('', Index.as_view(), name='home'),
+    path('services/', Services.as_view(), name='services'),
     path('blog/', views.Blog.as_view(), name='blog'),
     path('contact/', views.Contact.as_view(), name='contact'),
     path('portfolio/', views.Portfolio.as_view(), name='portfolio'),
-    path('about/', views.About.as_view(), name='about'),
-    path('ExternalSubcrib/', views.External.as_view(), name='ExternalSub')
+    path('about/', About.as_view(), name='about'),
+    path('ExternalSubcrib/', views.External.as_view(), name='ExternalSub'),
+    path('api/categories/<slug:slug>/posts/', views.SectionPostsAPI.as_view(kind='category'), name='api_category_posts'),
+    path('api/widgets/<slug:slug>/posts/', views.SectionPostsAPI.as_view(kind='widget'), name='api_widget_posts'),
+    path('api/sections/', views.SectionBatchAPI.as_view(), name='api_sections'),
+    path('api/search/', views.SearchAPI.as_view(), name='api_search'),
 ]
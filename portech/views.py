@@ -1,74 +1,337 @@
-import csv, io, datetime
+import csv, io, datetime, base64, hashlib
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse_lazy
-from django.views.generic import ListView, CreateView, UpdateView, DeleteView, FormView, DetailView, TemplateView
+from django.views.generic import ListView, CreateView, UpdateView, DeleteView, FormView, DetailView, TemplateView, View
 from django.contrib import messages
-from users.models import Category, CategoryPost, Widget, WidgetPost, NewsPost, ExternalSubscriber
+from users.models import NewsPost, ExternalSubscriber, SECTION_MODELS
+from users.cache import get_content_version, get_section_version, get_section_versions
+from users.search import search_posts, load_posts
 from users.views import SubcribersHubView
-from django.http import HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
+from django.core.cache import cache, caches
+from django.core.paginator import Paginator
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.fields.files import FieldFile
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
 from django.contrib import messages
 from django.views.generic.edit import FormView
 from users.utils import get_client_ip 
 from .forms import SubcribersForm
+from .sections import live_section_slugs, load_sections
+from .mixins import AsyncSectionsMixin, CachedPageMixin, ConditionalPageMixin, StreamingPageMixin
 from django.contrib.gis.geoip2 import GeoIP2
 
 
 
 
 
-class Index(TemplateView):
+class SectionPage(ConditionalPageMixin, CachedPageMixin, StreamingPageMixin, TemplateView):
+    """A public page built from category_sections/widget_sections."""
+
+    def get_sections(self):
+        # Async variants fill self.sections before rendering (see AsyncSectionsMixin)
+        if not hasattr(self, 'sections'):
+            self.sections = load_sections(self.category_sections, self.widget_sections)
+        return self.sections
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Tells {% cache_section %} which fragments this render may store
+        context['sections'] = self.get_sections()
+        return context
+
+
+class Index(SectionPage):
     template_name = 'portech/index.html'
+    category_sections = ['skills', 'our-team', 'recent-portfolio', 'faq', 'why-choose-us']
+    widget_sections = ['home-slider']
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['hero'] = WidgetPost.objects.filter(widget__slug='home-slider', is_published=True)
-        context["skills"] = CategoryPost.objects.filter(category__slug='skills', is_published=True)   
-        context['team'] = CategoryPost.objects.filter(category__slug='our-team', is_published=True)
-        context['design'] = CategoryPost.objects.filter(category__slug='recent-portfolio', is_published=True)
-        context['faq'] = CategoryPost.objects.filter(category__slug='faq', is_published=True)
-        context['why'] = CategoryPost.objects.filter(category__slug='why-choose-us', is_published=True)
-        context['teams'] = Category.objects.get(slug='our-team')
-        context['faqs'] = Category.objects.get(slug='faq')
-        context['whyus'] = Category.objects.get(slug='why-choose-us')
-        context['designs'] = Category.objects.get(slug='recent-portfolio') 
+        sections = self.get_sections()
+        context['hero'] = sections.widget('home-slider').posts
+        context["skills"] = sections.category('skills').posts
+        context['team'] = sections.category('our-team').posts
+        context['design'] = sections.category('recent-portfolio').posts
+        context['faq'] = sections.category('faq').posts
+        context['why'] = sections.category('why-choose-us').posts
+        context['teams'] = sections.category('our-team').parent
+        context['faqs'] = sections.category('faq').parent
+        context['whyus'] = sections.category('why-choose-us').parent
+        context['designs'] = sections.category('recent-portfolio').parent
         return context
     
 
-class Blog(TemplateView):
+class Blog(ConditionalPageMixin, CachedPageMixin, StreamingPageMixin, TemplateView):
     template_name = 'portech/blog.html'
 
-class Portfolio(TemplateView):
+class Portfolio(ConditionalPageMixin, CachedPageMixin, StreamingPageMixin, TemplateView):
     template_name = "portech/portfolio.html"
 
-class Contact(TemplateView):
+class Contact(ConditionalPageMixin, CachedPageMixin, StreamingPageMixin, TemplateView):
     
     template_name = "portech/contact.html"
 
-class About(TemplateView):
+class About(SectionPage):
     template_name = "portech/about.html"
+    category_sections = ['why-choose-us', 'faq', 'our-team']
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['why'] = CategoryPost.objects.filter(category__slug='why-choose-us', is_published=True)
-        context['whyus'] = Category.objects.get(slug='why-choose-us')
-        context['faqs'] = Category.objects.get(slug='faq')
-        context['faq'] = CategoryPost.objects.filter(category__slug='faq', is_published=True)
-        context['team'] = CategoryPost.objects.filter(category__slug='our-team', is_published=True)
-        context['teams'] = Category.objects.get(slug='our-team')
+        sections = self.get_sections()
+        context['why'] = sections.category('why-choose-us').posts
+        context['whyus'] = sections.category('why-choose-us').parent
+        context['faqs'] = sections.category('faq').parent
+        context['faq'] = sections.category('faq').posts
+        context['team'] = sections.category('our-team').posts
+        context['teams'] = sections.category('our-team').parent
         return context
     
 
-class Services(TemplateView):
+class Services(SectionPage):
     template_name = "portech/services.html"
+    category_sections = ['skills']
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["skills"] = CategoryPost.objects.filter(category__slug='skills', is_published=True)   
+        context["skills"] = self.get_sections().category('skills').posts
         return context
 
 
+# Same pages with an async GET; portech/urls.py serves these when
+# settings.PORTECH_ASYNC_VIEWS is on (only worth it under ASGI, BGTECH/asgi.py)
+class AsyncIndex(AsyncSectionsMixin, Index):
+    pass
+
+class AsyncAbout(AsyncSectionsMixin, About):
+    pass
+
+class AsyncServices(AsyncSectionsMixin, Services):
+    pass
+
+
+
+
+# ----------------------------------------------------
+# PUBLIC CONTENT API (headless mode)
+# ----------------------------------------------------
+def encode_cursor(post):
+    return base64.urlsafe_b64encode(f'{post.created_at.isoformat()}|{post.pk}'.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return (created_at, id) from a cursor, or raise ValueError."""
+    created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    created_at = parse_datetime(created_at)
+    if created_at is None:
+        raise ValueError(cursor)
+    return created_at, int(pk)
+
+
+def post_to_json(post, fields):
+    data = {}
+    for name in fields:
+        value = getattr(post, name, None)
+        if isinstance(value, FieldFile):
+            value = value.url if value else None
+        elif name == 'author':
+            value = value.full_name if value else None
+        data[name] = value
+    return data
+
+
+class SectionPostsAPI(View):
+    """
+    Published posts of one category/widget as JSON, newest first.
+    Pages with keyset cursors on (created_at, id) instead of OFFSET, so deep
+    pages cost the same as the first one. Only the parent's child_fields
+    (plus id/created_at/updated_at) are returned.
+    Usage: /api/categories/faq/posts/?limit=20&cursor=<next_cursor>
+    """
+    kind = 'category'  # or 'widget', set in portech/urls.py
+    default_limit = 20
+    max_limit = 100
+
+    def get(self, request, slug):
+        parent_model, post_model = SECTION_MODELS[self.kind]
+        parent = get_object_or_404(parent_model.objects.live(), slug=slug)
+
+        # Any save/delete in this section bumps its version, so the ETag only
+        # changes when the data can have changed
+        fingerprint = f'{self.kind}:{slug}:{get_section_version(self.kind, slug)}:{request.get_full_path()}'
+        etag = 'W/"%s"' % hashlib.md5(fingerprint.encode()).hexdigest()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = self.get_page(request, parent, post_model)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            patch_cache_control(response, public=True, max_age=settings.PORTECH_API_CACHE_SECONDS)
+        return response
+
+    def get_page(self, request, parent, post_model):
+        try:
+            limit = min(max(int(request.GET.get('limit', self.default_limit)), 1), self.max_limit)
+        except ValueError:
+            return JsonResponse({'error': 'limit must be a number.'}, status=400)
+
+        posts = post_model.objects.for_display(parent).filter(is_published=True).order_by('-created_at', '-id')
+        fields = ['id', 'created_at', 'updated_at'] + [name for name in parent.child_fields if name not in ('id', 'created_at', 'updated_at')]
+        if 'author' in fields:
+            posts = posts.select_related('author')
+
+        cursor = request.GET.get('cursor')
+        if cursor:
+            try:
+                created_at, pk = decode_cursor(cursor)
+            except (ValueError, UnicodeDecodeError):
+                return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+            posts = posts.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+        # One extra row tells us whether there is a next page without a COUNT
+        rows = list(posts[:limit + 1])
+        page = rows[:limit]
+        return JsonResponse({
+            self.kind: {'slug': parent.slug, 'title': parent.title},
+            'results': [post_to_json(post, fields) for post in page],
+            'next_cursor': encode_cursor(page[-1]) if len(rows) > limit else None,
+        })
+
+
+
+
+class SectionBatchAPI(View):
+    """
+    Several sections in one response, e.g. everything a homepage needs:
+    /api/sections/?widget=home-slider&category=skills:4,our-team:3,faq
+    Each slug takes an optional ":limit" (newest posts first). Sections come
+    from one grouped load (see portech/sections.py) and the whole response is
+    cached under the versions of the sections it contains, so editing one
+    section only rebuilds the batches that include it.
+    """
+    default_limit = 20
+    max_limit = 100
+    max_sections = 20
+
+    def get(self, request):
+        wanted = self.parse_sections(request)
+        if wanted is None:
+            return JsonResponse({'error': 'Use ?category=<slug>[:limit],... and/or ?widget=<slug>[:limit],... '
+                                          f'(at most {self.max_sections} sections).'}, status=400)
+
+        # Only existing sections get a version key (and the response a cache
+        # entry), so made-up slugs can't fill the cache with permanent keys
+        live = live_section_slugs()
+        known = [(kind, slug) for kind, slug, limit in wanted if slug in live[kind]]
+        versions = get_section_versions(known)
+        fingerprint = '|'.join(f"{kind}:{slug}:{limit}:{versions.get((kind, slug), '-')}" for kind, slug, limit in wanted)
+        digest = hashlib.md5(fingerprint.encode()).hexdigest()
+        etag = 'W/"%s"' % digest
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            key = f'api:sections:{digest}' if len(known) == len(wanted) else None
+            content = cache.get(key) if key else None
+            if content is None:
+                content = self.build(wanted, known).content
+                if key:
+                    cache.set(key, content, settings.PORTECH_PAGE_CACHE_TIMEOUT)
+            response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=settings.PORTECH_API_CACHE_SECONDS)
+        return response
+
+    def parse_sections(self, request):
+        """Return [(kind, slug, limit)], categories first, or None if malformed."""
+        wanted = []
+        for kind in ('category', 'widget'):
+            for value in request.GET.getlist(kind):
+                for item in filter(None, value.split(',')):
+                    slug, _, limit = item.strip().partition(':')
+                    try:
+                        limit = min(max(int(limit or self.default_limit), 1), self.max_limit)
+                    except ValueError:
+                        return None
+                    wanted.append((kind, slug, limit))
+        if not wanted or len(wanted) > self.max_sections:
+            return None
+        return wanted
+
+    def build(self, wanted, known):
+        # Unknown slugs come back empty from the SectionSet without being looked up
+        sections = load_sections(
+            [slug for kind, slug in known if kind == 'category'],
+            [slug for kind, slug in known if kind == 'widget'],
+        )
+        data = {}
+        for kind, slug, limit in wanted:
+            parent, posts = sections.get(kind, slug)
+            if parent is None:
+                data[f'{kind}:{slug}'] = None
+                continue
+            fields = ['id', 'created_at', 'updated_at'] + [name for name in parent.child_fields if name not in ('id', 'created_at', 'updated_at')]
+            data[f'{kind}:{slug}'] = {
+                'title': parent.title,
+                'results': [post_to_json(post, fields) for post in posts[:limit]],
+                # Continue with the per-section endpoint (SectionPostsAPI)
+                'next_cursor': encode_cursor(posts[limit - 1]) if len(posts) > limit else None,
+            }
+        return JsonResponse({'sections': data})
 
 
+
+
+class SearchAPI(View):
+    """
+    Ranked full-text search over published category/widget posts
+    (users/search.py), page by page. Responses are cached per content
+    version, so any post edit retires them, in the bounded 'search' cache
+    (settings.CACHES) under the case/whitespace-normalized query.
+    Usage: /api/search/?q=web+design&kind=category&page=2
+    """
+    paginate_by = 20
+
+    def get(self, request):
+        kind = request.GET.get('kind') or None
+        if kind is not None and kind not in SECTION_MODELS:
+            return JsonResponse({'error': "kind must be 'category' or 'widget'."}, status=400)
+
+        query = ' '.join(request.GET.get('q', '').lower().split())
+        page_number = request.GET.get('page', '').strip() or '1'
+        fingerprint = f'{kind}|{page_number}|{query}'
+        key = 'api:search:%s:%s' % (get_content_version(), hashlib.md5(fingerprint.encode()).hexdigest())
+        content = caches['search'].get(key)
+        if content is None:
+            content = self.build(query, kind, page_number).content
+            caches['search'].set(key, content)
+        response = HttpResponse(content, content_type='application/json')
+        patch_cache_control(response, public=True, max_age=settings.PORTECH_API_CACHE_SECONDS)
+        return response
+
+    def build(self, query, kind, page_number):
+        page = Paginator(search_posts(query, kind=kind), self.paginate_by).get_page(page_number)
+        results = []
+        for post in load_posts(page.object_list):
+            data = post_to_json(post, ['id', 'title', 'slug', 'excerpt', 'image', 'created_at'])
+            data.update(kind=post.parent_field, section=getattr(post, post.parent_field).slug)
+            results.append(data)
+        return JsonResponse({
+            'query': query,
+            'count': page.paginator.count,
+            'page': page.number,
+            'num_pages': page.paginator.num_pages,
+            'results': results,
+        })
+
+
+
+
+# Public pages are served from a shared cache, so they can't carry a per-visitor
+# CSRF token. Subscribing acts on no session or user, so the check adds nothing here.
+@method_decorator(csrf_exempt, name='dispatch')
 class External(FormView):
     template_name = 'portech/index.html'
     form_class = SubcribersForm
@@ -111,3 +374,9 @@ class External(FormView):
         # 5. Success Message
         messages.success(self.request, "Thank you for subscribing!")
         return HttpResponseRedirect(self.success_url)
+
+    def form_invalid(self, form):
+        # Never render the homepage template from here: it has no section
+        # data, and its {% cache_section %} fragments would be cached empty
+        messages.error(self.request, "Please enter a valid email address.")
+        return HttpResponseRedirect(self.success_url)
@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.html import format_html
-from .models import Role, CustomUser, AppVariable, Category, CategoryPost, Widget, WidgetPost, ExternalSubscriber, NewsPost
+from .models import Role, CustomUser, AppVariable, Category, CategoryPost, Widget, WidgetPost, ExternalSubscriber, NewsPost, Tag
+from .search import search_posts
 
 
 # ----------------------------------------------------
@@ -105,6 +106,14 @@ class ExternalSubscriberAdmin(admin.ModelAdmin):
 # ----------------------------------------------------
 # 4. CONTENT & WIDGET MANAGEMENT
 # ----------------------------------------------------
+class SearchIndexAdminMixin:
+    """Answer the changelist search box from the full-text index instead of icontains scans."""
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return super().get_search_results(request, queryset, search_term)
+        ids = search_posts(search_term, kind=self.model.parent_field, published=False).post_ids()
+        return queryset.filter(pk__in=ids), False
+
 class CategoryPostInline(admin.StackedInline):
     model = CategoryPost
     extra = 1
@@ -116,7 +125,7 @@ class CategoryAdmin(admin.ModelAdmin):
     inlines = [CategoryPostInline]
 
 @admin.register(CategoryPost)
-class CategoryPostAdmin(admin.ModelAdmin):
+class CategoryPostAdmin(SearchIndexAdminMixin, admin.ModelAdmin):
     list_display = ('title', 'category', 'author', 'is_published', 'created_at')
     list_filter = ('category', 'is_published')
     search_fields = ('title', 'content')
@@ -126,5 +135,13 @@ class WidgetAdmin(admin.ModelAdmin):
     list_display = ('title', 'slug')
 
 @admin.register(WidgetPost)
-class WidgetPostAdmin(admin.ModelAdmin):
-    list_display = ('title', 'widget', 'is_published')
\ No newline at end of file
+class WidgetPostAdmin(SearchIndexAdminMixin, admin.ModelAdmin):
+    list_display = ('title', 'widget', 'is_published')
+    search_fields = ('title', 'content')
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    # Rows are derived from the posts' tags strings; edit those instead
+    list_display = ('name', 'slug', 'post_count')
+    readonly_fields = ('post_count',)
+    search_fields = ('name', 'slug')
\ No newline at end of file
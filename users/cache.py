@@ -0,0 +1,179 @@
+import time
+from collections import Counter
+from types import MappingProxyType
+from django.core.cache import cache
+
+
+# ----------------------------------------------------
+# CONTENT VERSION
+# ----------------------------------------------------
+# One global counter that every editor save bumps (see users/signals.py).
+# Anything cached from CMS content puts this number in its key, so a bump
+# retires all of it at once without having to know which keys exist.
+CONTENT_VERSION_KEY = 'content:version'
+
+
+def _fresh_version():
+    # Seed from the clock so a flushed/evicted counter never restarts at a
+    # number that older cache entries were already stored under.
+    return int(time.time() * 1000)
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _fresh_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_version(), None)
+        return cache.get(key)
+
+
+def get_content_version():
+    return _get_version(CONTENT_VERSION_KEY)
+
+
+def bump_content_version():
+    return _bump_version(CONTENT_VERSION_KEY)
+
+
+# ----------------------------------------------------
+# SECTION VERSIONS
+# ----------------------------------------------------
+# Same idea as the content version, but per Category/Widget, so caching one
+# section (e.g. the FAQ block) survives edits to every other section.
+def section_version_key(kind, slug):
+    return f'section:{kind}:{slug}:version'
+
+
+def get_section_version(kind, slug):
+    """kind is 'category' or 'widget'."""
+    return _get_version(section_version_key(kind, slug))
+
+
+def get_section_versions(sections):
+    """Versions for several (kind, slug) pairs in one cache round trip."""
+    keys = {section_version_key(kind, slug): (kind, slug) for kind, slug in sections}
+    found = cache.get_many(keys)
+    return {section: found[key] if key in found else _get_version(key) for key, section in keys.items()}
+
+
+def bump_section_version(kind, slug):
+    return _bump_version(section_version_key(kind, slug))
+
+
+# ----------------------------------------------------
+# APP SETTINGS SNAPSHOT
+# ----------------------------------------------------
+# Every worker keeps a read-only {var_name: var_value} copy of AppVariable and
+# only reloads it when the shared settings version moves, so a page view costs
+# one cache read instead of a query. Bumped by AppVariable saves/deletes
+# (users/signals.py) and SiteSettingsKeyForm.save.
+SETTINGS_VERSION_KEY = 'settings:version'
+_settings_snapshot = (None, MappingProxyType({}))
+
+
+def get_settings_version():
+    return _get_version(SETTINGS_VERSION_KEY)
+
+
+def bump_settings_version():
+    return _bump_version(SETTINGS_VERSION_KEY)
+
+
+def get_app_settings():
+    """Return this process's AppVariable snapshot, reloading it if stale."""
+    global _settings_snapshot
+    version = get_settings_version()
+    loaded_version, snapshot = _settings_snapshot
+    if loaded_version != version:
+        from .models import AppVariable
+        snapshot = MappingProxyType(dict(AppVariable.objects.values_list('var_name', 'var_value')))
+        # Swap the whole tuple at once so other threads never see a half-updated pair
+        _settings_snapshot = (version, snapshot)
+    return snapshot
+
+
+def invalidate_app_settings():
+    """Forget this process's snapshot and make every other worker reload too."""
+    global _settings_snapshot
+    _settings_snapshot = (None, MappingProxyType({}))
+    bump_settings_version()
+
+
+def get_app_setting_names():
+    """
+    Setting names from the snapshot this process already holds, without a
+    version check. Only the first call in a fresh process touches the DB.
+    """
+    loaded_version, snapshot = _settings_snapshot
+    if loaded_version is None:
+        snapshot = get_app_settings()
+    return list(snapshot)
+
+
+# ----------------------------------------------------
+# ROLE PERMISSIONS VERSION
+# ----------------------------------------------------
+# Sessions cache their user's resolved role permissions under this number
+# (users/mixins.py); Role saves and role changes on a user bump it
+# (users/signals.py), so every session re-reads its role once.
+PERMISSIONS_VERSION_KEY = 'permissions:version'
+
+
+def get_permissions_version():
+    return _get_version(PERMISSIONS_VERSION_KEY)
+
+
+def bump_permissions_version():
+    return _bump_version(PERMISSIONS_VERSION_KEY)
+
+
+# Per-process counts of requests that got the settings context vs. requests
+# whose templates actually read one (see users/context_processors.py)
+_settings_usage = Counter()
+
+
+def record_settings_usage(name):
+    _settings_usage[name] += 1
+
+
+def get_settings_usage():
+    requests, touched = _settings_usage['requests'], _settings_usage['touched']
+    return {
+        'requests': requests,
+        'touched': touched,
+        'untouched': requests - touched,
+    }
+
+
+# ----------------------------------------------------
+# HIT / MISS COUNTERS
+# ----------------------------------------------------
+def record_stat(group, name):
+    """Increment a shared counter, e.g. record_stat('page', 'hits')."""
+    key = f'stats:{group}:{name}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def get_hit_stats(group):
+    """Return {'hits', 'misses', 'hit_rate'} for a counter group."""
+    values = cache.get_many([f'stats:{group}:hits', f'stats:{group}:misses'])
+    hits = values.get(f'stats:{group}:hits', 0)
+    misses = values.get(f'stats:{group}:misses', 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else None,
+    }
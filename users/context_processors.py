@@ -1,25 +1,28 @@
-from .models import AppVariable, Category
+from django.utils.functional import SimpleLazyObject
+from .cache import get_app_settings, get_app_setting_names, record_settings_usage
 
 
 def app_settings_processor(request):
-    settings_dict = {}
     try:
-        # Fetch only the var_name and var_value columns
-        variables = AppVariable.objects.all().values('var_name', 'var_value')
-        
-        for var in variables:
-            # Add the setting directly to the dictionary
-            settings_dict[var['var_name']] = var['var_value']
-            
-        # Optional print statements for debugging (remove in production)
-        # print("\n--- APP VARIABLE KEYS LOADED ---")
-        # print(settings_dict.keys())
-        # print("--------------------------------\n")
-            
+        names = get_app_setting_names()
     except Exception as e:
         print(f"Error loading AppVariables: {e}")
         # Return an empty dictionary if loading fails
-        settings_dict = {}
+        return {}
 
-    # CRITICAL FIX: Return the dictionary directly, not nested
-    return settings_dict
\ No newline at end of file
+    record_settings_usage('requests')
+
+    def load():
+        # Runs at most once per request: the first time a template reads a setting
+        record_settings_usage('touched')
+        try:
+            return get_app_settings()
+        except Exception as e:
+            print(f"Error loading AppVariables: {e}")
+            return {}
+
+    current = SimpleLazyObject(load)
+
+    # Every name is present up front, but nothing is checked or loaded until a
+    # template actually renders one of them
+    return {name: SimpleLazyObject(lambda name=name: current.get(name)) for name in names}
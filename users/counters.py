@@ -0,0 +1,41 @@
+"""
+Stored child counts: Category.post_count, Widget.post_count, Role.user_count.
+users/signals.py keeps them current with F() updates as rows are added,
+moved and deleted; reconcile() recomputes them in bulk for changes that
+skip signals (QuerySet.update(), raw SQL, fixtures).
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from .models import Category, CategoryPost, CustomUser, Role, Widget, WidgetPost
+
+
+# (parent model, counter field, child model, child's foreign key to the parent)
+COUNTERS = [
+    (Category, 'post_count', CategoryPost, 'category'),
+    (Widget, 'post_count', WidgetPost, 'widget'),
+    (Role, 'user_count', CustomUser, 'role'),
+]
+
+
+def adjust(parent_model, field, pk, delta):
+    """Atomically add delta to one parent's counter (never below zero)."""
+    if pk is not None:
+        parent_model.objects.filter(pk=pk).update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def child_count(child_model, fk):
+    return Coalesce(Subquery(
+        child_model.objects.filter(**{fk: OuterRef('pk')}).order_by().values(fk).annotate(n=Count('pk')).values('n')
+    ), 0)
+
+
+def reconcile():
+    """Recompute every counter; return {'Model.field': number of rows that were wrong}."""
+    fixed = {}
+    for parent_model, field, child_model, fk in COUNTERS:
+        actual = child_count(child_model, fk)
+        wrong = list(parent_model.objects.annotate(actual=actual).exclude(**{field: F('actual')}).values_list('pk', flat=True))
+        if wrong:
+            parent_model.objects.filter(pk__in=wrong).update(**{field: actual})
+        fixed[f'{parent_model.__name__}.{field}'] = len(wrong)
+    return fixed
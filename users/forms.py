@@ -8,8 +8,10 @@ from django.db.models.fields.files import FieldFile
 from django.contrib.auth import get_user_model
 from django.conf import settings
 import os
+from django.utils import timezone
 from .models import CustomUser, Role, AppVariable, Category, CategoryPost, POST_FIELD_CHOICES, Widget, WidgetPost, NewsPost, ExternalSubscriber
 from django_summernote.widgets import SummernoteWidget
+from .cache import bump_content_version, invalidate_app_settings
 
 CustomUser = get_user_model()
 
@@ -316,10 +318,14 @@ class SiteSettingsKeyForm(forms.Form):
 
     def save(self):
         for name, value in self.cleaned_data.items():
+            # .update() skips auto_now, so stamp lastupdated by hand (public page ETags read it)
             if name.startswith("desc_"):
-                AppVariable.objects.filter(var_name=name.replace("desc_", "")).update(description=value)
+                AppVariable.objects.filter(var_name=name.replace("desc_", "")).update(description=value, lastupdated=timezone.now())
             else:
-                AppVariable.objects.filter(var_name=name).update(var_value=value)
+                AppVariable.objects.filter(var_name=name).update(var_value=value, lastupdated=timezone.now())
+        # .update() sends no post_save, so retire cached pages and settings explicitly
+        bump_content_version()
+        invalidate_app_settings()
 
 
 class AdminUserCreationForm(forms.ModelForm):
@@ -339,6 +345,9 @@ class AdminUserCreationForm(forms.ModelForm):
 
         superior_roles = Role.objects.filter(slug__in=['super_admin', 'general_manager', 'manager', 'staff'])
         superior_users = CustomUser.objects.filter(role__in=superior_roles).order_by('username')
+        if self.instance.hierarchy_path:
+            # Nobody can report to themselves or to someone below them
+            superior_users = superior_users.exclude(**CustomUser.subtree_range(self.instance.hierarchy_path))
 
         self.fields['assigned_to'].required = False
         self.fields['assigned_to'].queryset = superior_users
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every user's hierarchy_path/hierarchy_depth from assigned_to, "
+        "for rows written without CustomUser.save() (bulk_create, "
+        "QuerySet.update(), raw SQL). Fixtures are placed automatically once "
+        "loaddata commits."
+    )
+
+    def handle(self, *args, **options):
+        changed = CustomUser.rebuild_hierarchy()
+        style = self.style.WARNING if changed else self.style.SUCCESS
+        self.stdout.write(style(f"hierarchy_path: {changed} user(s) corrected"))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from users.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the stored Category/Widget post_count and Role user_count "
+        "columns from the child tables, fixing any drift left by changes that "
+        "bypass signals (QuerySet.update(), raw SQL, fixtures)."
+    )
+
+    def handle(self, *args, **options):
+        for counter, fixed in reconcile().items():
+            style = self.style.WARNING if fixed else self.style.SUCCESS
+            self.stdout.write(style(f"{counter}: {fixed} row(s) corrected"))
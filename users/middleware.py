@@ -0,0 +1,50 @@
+from django.conf import settings
+from .routers import _pinned, _read_db, _request_writes, choose_replica, content_written_recently, pin_seconds
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Serve GET/HEAD requests for the URL namespaces in
+    settings.REPLICA_READ_NAMESPACES (the public site and its API) from a
+    read replica. A client that writes gets a short-lived cookie keeping it
+    on the primary, and for REPLICA_PIN_SECONDS after any content save
+    nobody reads from a replica (see users/routers.py).
+    """
+    cookie_name = 'db_pin'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        writes = {'wrote': False}
+        tokens = [_request_writes.set(writes), _pinned.set(self.is_pinned(request))]
+        try:
+            response = self.get_response(request)
+        finally:
+            replica_token = getattr(request, '_replica_token', None)
+            if replica_token is not None:
+                _read_db.reset(replica_token)
+            for token in reversed(tokens):
+                token.var.reset(token)
+
+        # Anonymous GETs can write too (e.g. snapshot self-repair); those
+        # don't need read-your-writes and shouldn't set cookies on public pages
+        if writes['wrote'] and (request.method not in ('GET', 'HEAD') or request.user.is_authenticated):
+            response.set_cookie(
+                self.cookie_name, '1', max_age=pin_seconds(),
+                secure=request.is_secure(), httponly=True, samesite='Lax',
+            )
+        return response
+
+    def is_pinned(self, request):
+        return self.cookie_name in request.COOKIES or content_written_recently()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        if request.resolver_match.namespace not in getattr(settings, 'REPLICA_READ_NAMESPACES', ()):
+            return None
+        alias = choose_replica()
+        if alias is not None:
+            request._replica_token = _read_db.set(alias)
+        return None
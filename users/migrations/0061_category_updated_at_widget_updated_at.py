@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0060_alter_newspost_sender_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='widget',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
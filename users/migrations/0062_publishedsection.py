@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:48
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0061_category_updated_at_widget_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PublishedSection',
+            fields=[
+                ('key', models.CharField(max_length=120, primary_key=True, serialize=False)),
+                ('payload', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('version', models.BigIntegerField(default=0)),
+                ('built_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0062_publishedsection'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='categorypost',
+            index=models.Index(fields=['category', '-created_at', '-id'], name='catpost_cat_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='categorypost',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['category', '-created_at', '-id'], name='catpost_cat_pub_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='widgetpost',
+            index=models.Index(fields=['widget', '-created_at', '-id'], name='widpost_wid_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='widgetpost',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['widget', '-created_at', '-id'], name='widpost_wid_pub_created_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0063_post_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(max_length=100, unique=True)),
+                ('post_count', models.PositiveIntegerField(db_index=True, default=0)),
+            ],
+            options={
+                'ordering': ['-post_count', 'name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='categorypost',
+            name='tag_set',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='category_posts', to='users.tag'),
+        ),
+        migrations.AddField(
+            model_name='widgetpost',
+            name='tag_set',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='widget_posts', to='users.tag'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+from django.utils.text import slugify
+
+
+def parse_tags(value):
+    # Frozen copy of users.models.parse_tags
+    tags = {}
+    for name in (value or '').split(','):
+        name = name.strip()[:100]
+        slug = slugify(name)[:100]
+        if slug and slug not in tags:
+            tags[slug] = name
+    return tags
+
+
+def backfill_tags(apps, schema_editor):
+    Tag = apps.get_model('users', 'Tag')
+    post_models = [apps.get_model('users', 'CategoryPost'), apps.get_model('users', 'WidgetPost')]
+
+    # Pass 1: every distinct tag, first spelling wins
+    parsed = {}
+    names = {}
+    for Post in post_models:
+        rows = Post.objects.exclude(tags__isnull=True).exclude(tags='').values_list('pk', 'tags')
+        parsed[Post] = [(pk, parse_tags(tags)) for pk, tags in rows.iterator()]
+        for _, tags in parsed[Post]:
+            for slug, name in tags.items():
+                names.setdefault(slug, name)
+    Tag.objects.bulk_create([Tag(name=name, slug=slug) for slug, name in names.items()], ignore_conflicts=True)
+    tag_ids = dict(Tag.objects.values_list('slug', 'pk'))
+
+    # Pass 2: the link rows
+    for Post in post_models:
+        through = Post.tag_set.through
+        links = [
+            through(**{f'{Post._meta.model_name}_id': pk, 'tag_id': tag_ids[slug]})
+            for pk, tags in parsed[Post]
+            for slug in tags
+        ]
+        through.objects.bulk_create(links, batch_size=500, ignore_conflicts=True)
+
+    def published_links(Post):
+        through = Post.tag_set.through
+        return Coalesce(models.Subquery(
+            through.objects.filter(tag_id=models.OuterRef('pk'), **{f'{Post._meta.model_name}__is_published': True})
+            .order_by().values('tag_id').annotate(n=models.Count('pk')).values('n')
+        ), 0)
+
+    Tag.objects.update(post_count=published_links(post_models[0]) + published_links(post_models[1]))
+
+
+def clear_tags(apps, schema_editor):
+    apps.get_model('users', 'Tag').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0064_tag'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_tags, clear_tags),
+    ]
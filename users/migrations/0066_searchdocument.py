@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0065_backfill_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=10)),
+                ('post_id', models.PositiveIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('excerpt', models.TextField(blank=True)),
+                ('body', models.TextField(blank=True)),
+                ('is_published', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'post_id'), name='searchdoc_kind_post_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,97 @@
+import html
+from django.db import migrations
+from django.utils.html import strip_tags
+
+
+DOCS = 'users_searchdocument'
+FTS = 'users_searchdocument_fts'
+
+SQLITE_INSTALL = [
+    f"""CREATE VIRTUAL TABLE {FTS} USING fts5(
+        title, excerpt, body, content='{DOCS}', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    f"""CREATE TRIGGER {DOCS}_ai AFTER INSERT ON {DOCS} BEGIN
+        INSERT INTO {FTS}(rowid, title, excerpt, body) VALUES (new.id, new.title, new.excerpt, new.body);
+    END""",
+    f"""CREATE TRIGGER {DOCS}_ad AFTER DELETE ON {DOCS} BEGIN
+        INSERT INTO {FTS}({FTS}, rowid, title, excerpt, body) VALUES ('delete', old.id, old.title, old.excerpt, old.body);
+    END""",
+    f"""CREATE TRIGGER {DOCS}_au AFTER UPDATE ON {DOCS} BEGIN
+        INSERT INTO {FTS}({FTS}, rowid, title, excerpt, body) VALUES ('delete', old.id, old.title, old.excerpt, old.body);
+        INSERT INTO {FTS}(rowid, title, excerpt, body) VALUES (new.id, new.title, new.excerpt, new.body);
+    END""",
+]
+SQLITE_UNINSTALL = [
+    f'DROP TRIGGER IF EXISTS {DOCS}_au',
+    f'DROP TRIGGER IF EXISTS {DOCS}_ad',
+    f'DROP TRIGGER IF EXISTS {DOCS}_ai',
+    f'DROP TABLE IF EXISTS {FTS}',
+]
+
+POSTGRES_INSTALL = [
+    f"""ALTER TABLE {DOCS} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(excerpt, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(body, '')), 'C')
+    ) STORED""",
+    f'CREATE INDEX {DOCS}_search_gin ON {DOCS} USING GIN (search_vector)',
+]
+POSTGRES_UNINSTALL = [
+    f'DROP INDEX IF EXISTS {DOCS}_search_gin',
+    f'ALTER TABLE {DOCS} DROP COLUMN IF EXISTS search_vector',
+]
+
+
+def run(schema_editor, statements):
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def install_index(apps, schema_editor):
+    # Other databases get no index; users/search.py falls back to icontains
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        run(schema_editor, SQLITE_INSTALL)
+    elif vendor == 'postgresql':
+        run(schema_editor, POSTGRES_INSTALL)
+
+
+def uninstall_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        run(schema_editor, SQLITE_UNINSTALL)
+    elif vendor == 'postgresql':
+        run(schema_editor, POSTGRES_UNINSTALL)
+
+
+def backfill_documents(apps, schema_editor):
+    # Frozen copy of users.search.document_fields; the triggers/generated
+    # column index the rows as they go in
+    SearchDocument = apps.get_model('users', 'SearchDocument')
+    for kind, model_name in (('category', 'CategoryPost'), ('widget', 'WidgetPost')):
+        Post = apps.get_model('users', model_name)
+        docs = [
+            SearchDocument(
+                kind=kind, post_id=pk, title=title or '', excerpt=strip_tags(excerpt or ''),
+                body=html.unescape(strip_tags(content or '')), is_published=is_published,
+            )
+            for pk, title, excerpt, content, is_published
+            in Post.objects.values_list('pk', 'title', 'excerpt', 'content', 'is_published').iterator()
+        ]
+        SearchDocument.objects.bulk_create(docs, batch_size=500, ignore_conflicts=True)
+
+
+def clear_documents(apps, schema_editor):
+    apps.get_model('users', 'SearchDocument').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0066_searchdocument'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_index, uninstall_index),
+        migrations.RunPython(backfill_documents, clear_documents),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0067_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='is_pending_delete',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='widget',
+            name='is_pending_delete',
+            field=models.BooleanField(default=False),
+        ),
+    ]
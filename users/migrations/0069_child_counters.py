@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:04
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    # Frozen copy of users.counters.reconcile()
+    counters = [
+        ('Category', 'post_count', 'CategoryPost', 'category'),
+        ('Widget', 'post_count', 'WidgetPost', 'widget'),
+        ('Role', 'user_count', 'CustomUser', 'role'),
+    ]
+    for parent_name, field, child_name, fk in counters:
+        Parent, Child = apps.get_model('users', parent_name), apps.get_model('users', child_name)
+        Parent.objects.update(**{field: Coalesce(models.Subquery(
+            Child.objects.filter(**{fk: models.OuterRef('pk')}).order_by().values(fk)
+            .annotate(n=models.Count('pk')).values('n')
+        ), 0)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0068_pending_delete'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='role',
+            name='user_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='widget',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:06
+
+from django.db import migrations, models
+
+
+def backfill_hierarchy(apps, schema_editor):
+    # Walk assigned_to top-down; anyone caught in a reporting loop (nothing
+    # prevented one before) is placed at the top of their own chain
+    CustomUser = apps.get_model('users', 'CustomUser')
+    manager_of = dict(CustomUser.objects.values_list('pk', 'assigned_to_id'))
+    children = {}
+    for pk, manager in manager_of.items():
+        children.setdefault(manager if manager in manager_of else None, []).append(pk)
+
+    paths = {}
+    level = [(pk, '') for pk in children.get(None, [])]
+    while level or len(paths) < len(manager_of):
+        if not level:
+            orphan = next(pk for pk in manager_of if pk not in paths)
+            level = [(orphan, '')]
+        next_level = []
+        for pk, parent_path in level:
+            if pk in paths or len(parent_path) // 32 >= 64:
+                continue
+            paths[pk] = parent_path + pk.hex
+            next_level.extend((child, paths[pk]) for child in children.get(pk, []))
+        level = next_level
+
+    users = [CustomUser(pk=pk, hierarchy_path=path, hierarchy_depth=len(path) // 32 - 1) for pk, path in paths.items()]
+    CustomUser.objects.bulk_update(users, ['hierarchy_path', 'hierarchy_depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0069_child_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='hierarchy_depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='hierarchy_path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=2048),
+        ),
+        migrations.RunPython(backfill_hierarchy, migrations.RunPython.noop),
+    ]
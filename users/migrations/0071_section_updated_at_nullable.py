@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0070_user_hierarchy_path'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='category',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='widget',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, null=True),
+        ),
+    ]
@@ -1,7 +1,50 @@
 from django.contrib.auth.mixins import AccessMixin
 from django.core.exceptions import PermissionDenied
+from django.db import models
 from django.shortcuts import redirect
 from functools import wraps
+from .cache import get_permissions_version
+from .models import Role
+
+# --- Cached role permissions ---
+
+PERMISSIONS_SESSION_KEY = '_role_permissions'
+
+
+def resolve_role_permissions(user):
+    """The role slug, superuser flag and every boolean permission field of the user's role."""
+    role = user.role
+    permissions = {'role': role.slug if role else None, 'is_superuser': user.is_superuser}
+    if role:
+        permissions.update({
+            field.name: getattr(role, field.name)
+            for field in Role._meta.fields if isinstance(field, models.BooleanField)
+        })
+    return permissions
+
+
+def remember_role_permissions(request, user):
+    permissions = resolve_role_permissions(user)
+    request.session[PERMISSIONS_SESSION_KEY] = {
+        'user': str(user.pk), 'version': get_permissions_version(), 'permissions': permissions,
+    }
+    return permissions
+
+
+def get_role_permissions(request):
+    """
+    request.user's permissions from the session, filled in at login
+    (users/signals.py) and re-resolved only after a Role or role change
+    bumps the permissions version, so guarded views skip the role query.
+    """
+    cached = request.session.get(PERMISSIONS_SESSION_KEY)
+    if cached and cached['user'] == str(request.user.pk) and cached['version'] == get_permissions_version():
+        return cached['permissions']
+    return remember_role_permissions(request, request.user)
+
+
+def has_role_permission(request, permission_name):
+    return get_role_permissions(request).get(permission_name) is True
 
 # --- Class-Based View Mixin ---
 
@@ -22,13 +65,9 @@ class RolePermissionRequiredMixin(AccessMixin):
         if not request.user.is_authenticated:
             return self.handle_no_permission()
 
-        user_role = request.user.role
-
-        # 2. Check if the user has a role and if the required_permission is set
-        if user_role and hasattr(user_role, self.required_permission):
-            # Use getattr to dynamically fetch the permission field value (True/False)
-            if getattr(user_role, self.required_permission):
-                return super().dispatch(request, *args, **kwargs)
+        # 2. Check the role's required_permission flag (cached in the session)
+        if has_role_permission(request, self.required_permission):
+            return super().dispatch(request, *args, **kwargs)
 
         # 3. If permission check fails
         return self.handle_no_permission()
@@ -47,11 +86,8 @@ def role_permission_required(permission_name):
                 # Redirect unauthenticated users to the login page (or handle_no_permission)
                 return redirect('login') 
 
-            user_role = request.user.role
-
-            if user_role and hasattr(user_role, permission_name):
-                if getattr(user_role, permission_name):
-                    return view_func(request, *args, **kwargs)
+            if has_role_permission(request, permission_name):
+                return view_func(request, *args, **kwargs)
 
             # If permission check fails, raise 403 Forbidden
             raise PermissionDenied
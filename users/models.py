@@ -11,6 +11,16 @@ from django.dispatch import receiver
 from datetime import timedelta
 from django.core.mail import EmailMessage # Required for BCC and HTML
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.fields.files import FieldFile
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce, Concat, Substr
+from .cache import get_app_settings, invalidate_app_settings
+from .utils import save_with_unique_slug
+from .routers import read_from_replica
 
 
 
@@ -61,6 +71,23 @@ POST_FIELD_CHOICES = {
 }
 
 
+class StoredCounterMixin:
+    """
+    For models whose counter_fields are kept by F() updates in users/signals.py:
+    a plain save() of an existing row writes every other column, so a stale
+    in-memory count can't overwrite the one in the database.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert') and not args:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
 # ----------------------------------------------------
 # 2. INDEPENDENT MODELS (App Settings)
 # ----------------------------------------------------
@@ -74,22 +101,63 @@ class AppVariable(models.Model):
     def __str__(self):
         return f"{self.var_name}: {self.var_value}"
 
+    # Reads go through the per-process snapshot in users/cache.py, so a task
+    # or view asking for several settings costs one cache read, not N queries.
     @staticmethod
     def get_setting(name, default=''):
+        return get_app_settings().get(name, default)
+
+    @staticmethod
+    def get_settings(names, default=''):
+        """Return {name: value} for several settings in one lookup."""
+        snapshot = get_app_settings()
+        return {name: snapshot.get(name, default) for name in names}
+
+    @staticmethod
+    def get_int(name, default=0):
         try:
-            return AppVariable.objects.get(var_name=name).var_value
-        except AppVariable.DoesNotExist:
+            return int(AppVariable.get_setting(name))
+        except (TypeError, ValueError):
             return default
 
+    @staticmethod
+    def get_bool(name, default=False):
+        value = AppVariable.get_setting(name, None)
+        if value in (None, ''):
+            return default
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+    @staticmethod
+    def get_email(name, default=''):
+        value = (AppVariable.get_setting(name) or '').strip()
+        try:
+            validate_email(value)
+        except ValidationError:
+            return default
+        return value
+
+    @staticmethod
+    def get_list(name, separator=','):
+        value = AppVariable.get_setting(name) or ''
+        return [item.strip() for item in value.split(separator) if item.strip()]
+
+    @staticmethod
+    def invalidate_settings():
+        """Drop every worker's snapshot, e.g. after editing rows with .update() or raw SQL."""
+        invalidate_app_settings()
+
 
 # ----------------------------------------------------
 # 3. PERMISSIONS & HIERARCHY (Role must come before User)
 # ----------------------------------------------------
-class Role(models.Model):
+class Role(StoredCounterMixin, models.Model):
     name = models.CharField(max_length=50, unique=True, verbose_name="Role Name")
     slug = models.SlugField(max_length=50, unique=True, editable=False)
     can_create_user = models.BooleanField(default=False, verbose_name="Can Create Users")
     can_assign_staff = models.BooleanField(default=False, verbose_name="Can Assign Staff (Manager)")
+    # Kept current by users/signals.py; `manage.py reconcile_counters` repairs drift
+    user_count = models.PositiveIntegerField(default=0, editable=False)
+    counter_fields = ('user_count',)
 
     class Meta:
         verbose_name = "User Role"
@@ -149,6 +217,10 @@ class Department(models.Model):
 
         
 
+# Deepest assigned_to chain hierarchy_path can hold
+HIERARCHY_MAX_DEPTH = 64
+
+
 class CustomUser(AbstractBaseUser, PermissionsMixin):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     email = models.EmailField(unique=True)
@@ -168,6 +240,11 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     # Note: Ensure 'Role' is imported or defined above
     role = models.ForeignKey('users.Role', on_delete=models.SET_NULL, null=True, blank=True, related_name='users')
     assigned_to = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='subordinates')
+    # Materialized path of the assigned_to chain: the 32-char hex id of every
+    # manager from the top down, then this user's own. Kept in sync by save(),
+    # so a whole reporting line is one indexed range scan (get_descendants()).
+    hierarchy_path = models.CharField(max_length=HIERARCHY_MAX_DEPTH * 32, blank=True, db_index=True, editable=False)
+    hierarchy_depth = models.PositiveSmallIntegerField(default=0, editable=False)
     
     region = models.CharField(max_length=50, blank=True, null=True)
     religion = models.CharField(max_length=50, blank=True, null=True)
@@ -191,19 +268,178 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
 
     def save(self, *args, **kwargs):
         self.full_name = f"{self.first_name} {self.last_name}".strip()
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'assigned_to' not in update_fields:
+            return super().save(*args, **kwargs)
+
+        old_path = self.place_in_hierarchy()
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'hierarchy_path', 'hierarchy_depth'}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if old_path and old_path != self.hierarchy_path:
+                # Moved: carry the whole subtree along in one UPDATE
+                CustomUser.rebase_subtree(old_path, self.hierarchy_path, self.hierarchy_depth - (len(old_path) // 32 - 1))
+
+    def clean(self):
+        super().clean()
+        self.place_in_hierarchy()
+
+    # --- Reporting hierarchy (assigned_to) ---
+
+    def place_in_hierarchy(self):
+        """
+        Set hierarchy_path/depth from assigned_to and return the stored path
+        (empty for a new user). Raises ValidationError on a loop (reporting to
+        oneself or to someone below) or a chain deeper than HIERARCHY_MAX_DEPTH.
+        """
+        rows = dict(CustomUser.objects.filter(pk__in=[self.pk, self.assigned_to_id]).values_list('pk', 'hierarchy_path'))
+        old_path = rows.get(self.pk, '')
+        parent_path = rows.get(self.assigned_to_id, '') if self.assigned_to_id else ''
+        if old_path and parent_path.startswith(old_path):
+            raise ValidationError({'assigned_to': "A user can't report to themselves or to someone who reports to them."})
+        if len(parent_path) // 32 >= HIERARCHY_MAX_DEPTH:
+            raise ValidationError({'assigned_to': f"Reporting chains are limited to {HIERARCHY_MAX_DEPTH} levels."})
+
+        self.hierarchy_path = parent_path + self.pk.hex
+        self.hierarchy_depth = len(parent_path) // 32
+        return old_path
+
+    @staticmethod
+    def subtree_range(path):
+        # Ids are hex, so every path below `path` sorts in [path, path + 'g')
+        return {'hierarchy_path__gte': path, 'hierarchy_path__lt': path + 'g'}
+
+    @classmethod
+    def rebase_subtree(cls, old_prefix, new_prefix, depth_change):
+        """Move every user strictly below old_prefix under new_prefix."""
+        cls.objects.filter(**cls.subtree_range(old_prefix)).exclude(hierarchy_path=old_prefix).update(
+            hierarchy_path=Concat(models.Value(new_prefix), Substr('hierarchy_path', len(old_prefix) + 1)),
+            hierarchy_depth=F('hierarchy_depth') + depth_change,
+        )
+
+    @classmethod
+    def rebuild_hierarchy(cls, using=None):
+        """
+        Recompute every hierarchy_path/depth from assigned_to, for rows written
+        without save() (fixtures, bulk_create, QuerySet.update()). Anyone caught
+        in a reporting loop goes to the top of their own chain. Returns the
+        number of users whose path changed.
+        """
+        users = cls.objects.db_manager(using)
+        rows = {pk: (manager, path) for pk, manager, path in users.values_list('pk', 'assigned_to_id', 'hierarchy_path')}
+        children = {}
+        for pk, (manager, _) in rows.items():
+            children.setdefault(manager if manager in rows else None, []).append(pk)
+
+        paths = {}
+        level = [(pk, '') for pk in children.get(None, [])]
+        while level or len(paths) < len(rows):
+            if not level:
+                level = [(next(pk for pk in rows if pk not in paths), '')]
+            next_level = []
+            for pk, parent_path in level:
+                if pk in paths or len(parent_path) // 32 >= HIERARCHY_MAX_DEPTH:
+                    continue
+                paths[pk] = parent_path + pk.hex
+                next_level.extend((child, paths[pk]) for child in children.get(pk, []))
+            level = next_level
+
+        changed = [
+            cls(pk=pk, hierarchy_path=path, hierarchy_depth=len(path) // 32 - 1)
+            for pk, path in paths.items() if rows[pk][1] != path
+        ]
+        users.bulk_update(changed, ['hierarchy_path', 'hierarchy_depth'], batch_size=500)
+        return len(changed)
+
+    def get_descendants(self, include_self=False):
+        """Everyone reporting to this user, directly or not, in tree order (one query)."""
+        if not self.hierarchy_path:
+            # Never placed (see rebuild_hierarchy); an empty prefix would match everyone
+            return CustomUser.objects.none()
+        users = CustomUser.objects.filter(**self.subtree_range(self.hierarchy_path))
+        if not include_self:
+            users = users.exclude(pk=self.pk)
+        return users.order_by('hierarchy_path')
+
+    def get_ancestors(self):
+        """This user's managers, top of the chain first (one query)."""
+        ids = [uuid.UUID(self.hierarchy_path[i:i + 32]) for i in range(0, len(self.hierarchy_path) - 32, 32)]
+        return CustomUser.objects.filter(pk__in=ids).order_by('hierarchy_depth')
 
 
 
 # ----------------------------------------------------
 # 5. CONTENT CATEGORIES (Category then CategoryPost)
 # ----------------------------------------------------
-class Category(models.Model):
+# Columns every listing reads whatever the parent enables (titles, teasers,
+# thumbnails, publish state); the rest load only if child_fields lists them.
+DISPLAY_FIELDS = ['title', 'slug', 'excerpt', 'image', 'is_published', 'author', 'created_at', 'updated_at']
+
+
+def display_columns(post_model, parents):
+    """Concrete post fields shown for these parents: id, the FK, DISPLAY_FIELDS and their child_fields."""
+    wanted = {post_model._meta.pk.name, post_model.parent_field, *DISPLAY_FIELDS}
+    for parent in parents:
+        wanted.update(parent.child_fields or [])
+    return [field for field in post_model._meta.concrete_fields if field.name in wanted]
+
+
+class PostQuerySet(models.QuerySet):
+    def for_display(self, *parents):
+        """
+        Posts of the given Category/Widget rows, selecting only the columns
+        their child_fields enable plus DISPLAY_FIELDS, so disabled blobs such
+        as content/shortcodes never leave the DB. Each post gets its parent
+        attached without a join. Fields left out still load on access.
+        Usage: CategoryPost.objects.for_display(category)
+        """
+        parent_field = self.model.parent_field
+        columns = [field.name for field in display_columns(self.model, parents)]
+
+        qs = self.filter(**{f'{parent_field}__in': parents}).only(*columns)
+        # Same hook Django's related managers use to hand back a known parent
+        qs._known_related_objects = {
+            **qs._known_related_objects,
+            self.model._meta.get_field(parent_field): {parent.pk: parent for parent in parents},
+        }
+        return qs
+
+    def tagged(self, slug):
+        """Posts carrying the tag with this slug (a lookup on the tag link table)."""
+        return self.filter(tag_set__slug=slug)
+
+    def related_to(self, post):
+        """Other posts sharing at least one tag with `post`, most shared tags first."""
+        return (
+            self.filter(tag_set__in=post.tag_set.all())
+            .exclude(pk=post.pk)
+            .annotate(shared_tags=models.Count('tag_set'))
+            .order_by('-shared_tags', '-created_at')
+        )
+
+
+class SectionParentQuerySet(models.QuerySet):
+    def live(self):
+        """Rows not waiting on a background delete (see users.tasks.delete_section)."""
+        return self.filter(is_pending_delete=False)
+
+
+class Category(StoredCounterMixin, models.Model):
     title = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(max_length=100, unique=True, blank=True)
     excerpt = models.TextField(blank=True, null=True)
     media_file = models.FileField(upload_to='category_media/{category}/', blank=True, null=True)
     child_fields = models.JSONField(default=list, blank=True)
+    # Nullable: fixtures are loaded raw, which skips auto_now
+    updated_at = models.DateTimeField(auto_now=True, null=True)
+    # Set by the delete view; hidden everywhere until the task removes the rows
+    is_pending_delete = models.BooleanField(default=False)
+    # Kept current by users/signals.py; `manage.py reconcile_counters` repairs drift
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+    counter_fields = ('post_count',)
+
+    objects = SectionParentQuerySet.as_manager()
 
     def save(self, *args, **kwargs):
         if not self.slug: self.slug = slugify(self.title)
@@ -224,6 +460,8 @@ class CategoryPost(models.Model):
     excerpt = models.TextField(blank=True, null=True)
     content = models.TextField(blank=True, null=True)
     tags = models.CharField(max_length=255, blank=True, null=True)
+    # Normalized copy of `tags`, kept in sync on save (see Tag.sync)
+    tag_set = models.ManyToManyField('Tag', blank=True, editable=False, related_name='category_posts')
     address = models.CharField(max_length=255, blank=True, null=True)
     subtitle = models.CharField(max_length=255, blank=True, null=True)
     shortcodes = models.TextField(blank=True, null=True)
@@ -244,27 +482,47 @@ class CategoryPost(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)       
 
+    parent_field = 'category'
+    media_dir = 'category_posts'  # Uploads land in <media_dir>/<parent title slug>/<post slug>/
+    objects = PostQuerySet.as_manager()
+
     @property
     def primary_image_url(self):
         return self.image.url if self.image else None
 
     def save(self, *args, **kwargs):
-        if not self.slug: self.slug = slugify(self.title)
-        super().save(*args, **kwargs)
+        if self.slug:
+            return super().save(*args, **kwargs)
+        return save_with_unique_slug(self, self.title, super().save, *args, **kwargs)
 
     class Meta:
         ordering = ['category', '-created_at']
+        indexes = [
+            # Admin lists and Meta.ordering: filter by category, newest first
+            models.Index(fields=['category', '-created_at', '-id'], name='catpost_cat_created_idx'),
+            # Public pages/API only read published rows (partial index on SQLite/Postgres)
+            models.Index(fields=['category', '-created_at', '-id'], condition=models.Q(is_published=True), name='catpost_cat_pub_created_idx'),
+        ]
 
 
 # ----------------------------------------------------
 # 6. WIDGETS (Widget then WidgetPost)
 # ----------------------------------------------------
-class Widget(models.Model):
+class Widget(StoredCounterMixin, models.Model):
     title = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(max_length=100, unique=True, blank=True)
     excerpt = models.TextField(blank=True, null=True)
     media_file = models.FileField(upload_to='widget_media/{widget}/', blank=True, null=True)
     child_fields = models.JSONField(default=list, blank=True)
+    # Nullable: fixtures are loaded raw, which skips auto_now
+    updated_at = models.DateTimeField(auto_now=True, null=True)
+    # Set by the delete view; hidden everywhere until the task removes the rows
+    is_pending_delete = models.BooleanField(default=False)
+    # Kept current by users/signals.py; `manage.py reconcile_counters` repairs drift
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+    counter_fields = ('post_count',)
+
+    objects = SectionParentQuerySet.as_manager()
 
     def save(self, *args, **kwargs):
         if not self.slug: self.slug = slugify(self.title)
@@ -281,6 +539,8 @@ class WidgetPost(models.Model):
     excerpt = models.TextField(blank=True, null=True)
     content = models.TextField(blank=True, null=True)
     tags = models.CharField(max_length=255, blank=True, null=True)
+    # Normalized copy of `tags`, kept in sync on save (see Tag.sync)
+    tag_set = models.ManyToManyField('Tag', blank=True, editable=False, related_name='widget_posts')
     address = models.CharField(max_length=255, blank=True, null=True)
     subtitle = models.CharField(max_length=255, blank=True, null=True)
     shortcodes = models.TextField(blank=True, null=True)
@@ -301,16 +561,190 @@ class WidgetPost(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    parent_field = 'widget'
+    media_dir = 'widget_posts'  # Uploads land in <media_dir>/<parent title slug>/<post slug>/
+    objects = PostQuerySet.as_manager()
+
     @property
     def primary_image_url(self):
         return self.image.url if self.image else None
 
     def save(self, *args, **kwargs):
-        if not self.slug: self.slug = slugify(self.title)
-        super().save(*args, **kwargs)
+        if self.slug:
+            return super().save(*args, **kwargs)
+        return save_with_unique_slug(self, self.title, super().save, *args, **kwargs)
 
     class Meta:
         ordering = ['widget', '-created_at']
+        indexes = [
+            models.Index(fields=['widget', '-created_at', '-id'], name='widpost_wid_created_idx'),
+            models.Index(fields=['widget', '-created_at', '-id'], condition=models.Q(is_published=True), name='widpost_wid_pub_created_idx'),
+        ]
+
+
+# ----------------------------------------------------
+# 7. PUBLISHED SECTION SNAPSHOTS
+# ----------------------------------------------------
+def _snapshot_row(obj, fields):
+    row = {}
+    for field in fields:
+        value = field.value_from_object(obj)
+        row[field.attname] = value.name if isinstance(value, FieldFile) else value
+    return row
+
+
+def _hydrate_row(model, row):
+    # from_db() builds a normal "loaded" instance; columns left out of the
+    # snapshot stay deferred and load on access like with .only()
+    fields = [field for field in model._meta.concrete_fields if field.attname in row]
+    return model.from_db('default', [f.attname for f in fields], [f.to_python(row[f.attname]) for f in fields])
+
+
+class PublishedSection(models.Model):
+    """
+    One row per Category/Widget holding its published posts pre-serialized
+    (the columns for_display() would load), so a page reads a section with a
+    single primary-key lookup. `version` is the section version the row was
+    built from (users/cache.py); rows whose version is no longer current are
+    ignored and rebuilt, so a snapshot can never outlive the edit after it.
+    Rebuilt by the first page read after an edit (portech/sections.py).
+    """
+    key = models.CharField(max_length=120, primary_key=True)  # "<kind>:<slug>"
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    version = models.BigIntegerField(default=0)
+    built_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self): return self.key
+
+    @staticmethod
+    def make_key(kind, slug):
+        return f'{kind}:{slug}'
+
+    @classmethod
+    def snapshot(cls, kind, parent, posts, version):
+        """An unsaved row for store_all(), holding `parent` and its published `posts`."""
+        parent_model, post_model = SECTION_MODELS[kind]
+        post_fields = display_columns(post_model, [parent])
+        payload = {
+            'parent': _snapshot_row(parent, parent_model._meta.concrete_fields),
+            'posts': [_snapshot_row(post, post_fields) for post in posts],
+        }
+        return cls(key=cls.make_key(kind, parent.slug), payload=payload, version=version)
+
+    @classmethod
+    def store_all(cls, snapshots):
+        """Insert or replace several snapshots with one statement (one short write lock on SQLite)."""
+        if snapshots:
+            cls.objects.bulk_create(snapshots, update_conflicts=True, unique_fields=['key'], update_fields=['payload', 'version', 'built_at'])
+
+    def hydrate(self):
+        """Return (parent, posts) as model instances, without touching the post tables."""
+        kind = self.key.split(':', 1)[0]
+        parent_model, post_model = SECTION_MODELS[kind]
+        parent = _hydrate_row(parent_model, self.payload['parent'])
+        posts = []
+        for row in self.payload['posts']:
+            post = _hydrate_row(post_model, row)
+            setattr(post, post_model.parent_field, parent)
+            posts.append(post)
+        return parent, posts
+
+
+SECTION_MODELS = {
+    'category': (Category, CategoryPost),
+    'widget': (Widget, WidgetPost),
+}
+
+
+# ----------------------------------------------------
+# 8. TAGS (normalized from the posts' comma-separated `tags`)
+# ----------------------------------------------------
+def parse_tags(value):
+    """Split a comma-separated tags string into {slug: name}, dropping blanks and repeats."""
+    tags = {}
+    for name in (value or '').split(','):
+        name = name.strip()[:100]
+        slug = slugify(name)[:100]
+        if slug and slug not in tags:
+            tags[slug] = name
+    return tags
+
+
+class Tag(models.Model):
+    """
+    One row per distinct tag across CategoryPost and WidgetPost. The posts'
+    `tags` strings stay the editable source; their tag_set links are rebuilt
+    from it on save (users/signals.py). post_count is the number of published
+    posts carrying the tag, refreshed whenever one of them changes.
+    """
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(max_length=100, unique=True)
+    post_count = models.PositiveIntegerField(default=0, db_index=True)
+
+    def __str__(self): return self.name
+
+    class Meta:
+        ordering = ['-post_count', 'name']
+
+    @classmethod
+    def sync(cls, post):
+        """Point post.tag_set at the tags named in post.tags, creating missing ones."""
+        wanted = parse_tags(post.tags)
+        old_ids = set(post.tag_set.values_list('pk', flat=True))
+        tags = list(cls.objects.filter(slug__in=wanted)) if wanted else []
+        if len(tags) < len(wanted):
+            have = {tag.slug for tag in tags}
+            cls.objects.bulk_create(
+                [cls(name=name, slug=slug) for slug, name in wanted.items() if slug not in have],
+                ignore_conflicts=True,
+            )
+            tags = list(cls.objects.filter(slug__in=wanted))
+        post.tag_set.set(tags)
+        cls.refresh_counts(old_ids | {tag.pk for tag in tags})
+
+    @classmethod
+    def refresh_counts(cls, tag_ids):
+        """Recount published posts for the given tags in one UPDATE."""
+        if not tag_ids:
+            return
+
+        def published_links(post_model):
+            through = post_model.tag_set.through
+            post_column = post_model._meta.model_name
+            return Coalesce(models.Subquery(
+                through.objects.filter(tag_id=models.OuterRef('pk'), **{f'{post_column}__is_published': True})
+                .order_by().values('tag_id').annotate(n=models.Count('pk')).values('n')
+            ), 0)
+
+        cls.objects.filter(pk__in=tag_ids).update(
+            post_count=published_links(CategoryPost) + published_links(WidgetPost)
+        )
+
+
+# ----------------------------------------------------
+# 9. SEARCH INDEX (queried through users/search.py)
+# ----------------------------------------------------
+class SearchDocument(models.Model):
+    """
+    Plain-text copy of one CategoryPost/WidgetPost, kept current on save and
+    delete (users/signals.py). The full-text index over title/excerpt/body is
+    created by migration 0067: an FTS5 table kept in step by triggers on
+    SQLite, a generated tsvector column with a GIN index on PostgreSQL.
+    """
+    kind = models.CharField(max_length=10)  # 'category' or 'widget', as in SECTION_MODELS
+    post_id = models.PositiveIntegerField()
+    title = models.CharField(max_length=255)
+    excerpt = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+    is_published = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self): return f'{self.kind}:{self.post_id} {self.title}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'post_id'], name='searchdoc_kind_post_uniq'),
+        ]
 
 
 
@@ -396,22 +830,24 @@ class NewsPost(models.Model):
         from users.models import ExternalSubscriber  # Local import to avoid circular dependency
 
         emails = set()
-
-        if self.target_audience == 'all':
-            emails.update(CustomUser.objects.filter(is_active=True).values_list('email', flat=True))
-            emails.update(ExternalSubscriber.objects.values_list('email', flat=True))
-        elif self.target_audience == 'staff_only':
-            emails.update(CustomUser.objects.filter(is_staff=True, is_active=True).values_list('email', flat=True))
-        elif self.target_audience == 'external_only':
-            emails.update(ExternalSubscriber.objects.values_list('email', flat=True))
-        elif self.target_audience == 'clients':
-            emails.update(CustomUser.objects.filter(role__name__iexact='Clients', is_active=True).values_list('email', flat=True))
-        elif self.target_audience == 'super_admin':
-            emails.update(CustomUser.objects.filter(is_superuser=True, is_active=True).values_list('email', flat=True))
-        elif self.target_audience == 'is_manager':
-            emails.update(CustomUser.objects.filter(is_manager=True, is_active=True).values_list('email', flat=True))
-        elif self.target_audience == 'administrator':
-            emails.update(CustomUser.objects.filter(role__name__iexact='Administrator', is_active=True).values_list('email', flat=True))
+        # Audience lists may trail the primary by a few seconds; keep these
+        # full-table scans on a replica
+        with read_from_replica():
+            if self.target_audience == 'all':
+                emails.update(CustomUser.objects.filter(is_active=True).values_list('email', flat=True))
+                emails.update(ExternalSubscriber.objects.values_list('email', flat=True))
+            elif self.target_audience == 'staff_only':
+                emails.update(CustomUser.objects.filter(is_staff=True, is_active=True).values_list('email', flat=True))
+            elif self.target_audience == 'external_only':
+                emails.update(ExternalSubscriber.objects.values_list('email', flat=True))
+            elif self.target_audience == 'clients':
+                emails.update(CustomUser.objects.filter(role__name__iexact='Clients', is_active=True).values_list('email', flat=True))
+            elif self.target_audience == 'super_admin':
+                emails.update(CustomUser.objects.filter(is_superuser=True, is_active=True).values_list('email', flat=True))
+            elif self.target_audience == 'is_manager':
+                emails.update(CustomUser.objects.filter(is_manager=True, is_active=True).values_list('email', flat=True))
+            elif self.target_audience == 'administrator':
+                emails.update(CustomUser.objects.filter(role__name__iexact='Administrator', is_active=True).values_list('email', flat=True))
 
         return list(filter(None, emails))
 
@@ -428,9 +864,6 @@ class NewsPost(models.Model):
 
         # Auto-generate slug if empty
         if not self.slug:
-            base_slug = slugify(self.title)
-            self.slug = base_slug
-            while NewsPost.objects.filter(slug=self.slug).exists():
-                self.slug = f"{base_slug}-{uuid.uuid4().hex[:4]}"
+            return save_with_unique_slug(self, self.title, super().save, *args, **kwargs)
 
         super().save(*args, **kwargs)
\ No newline at end of file
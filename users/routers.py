@@ -0,0 +1,83 @@
+"""
+Read-replica routing.
+
+Every query goes to 'default' (the primary) unless it runs inside
+read_from_replica(), which sends reads to one of settings.DATABASE_REPLICAS.
+ReplicaRoutingMiddleware wraps public (portech) GET/HEAD views in it and
+keeps a client on the primary for a few seconds after it writes, so editors
+always see their own changes.
+
+Usage:
+    with read_from_replica():
+        emails = list(ExternalSubscriber.objects.values_list('email', flat=True))
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+
+
+# Alias reads go to; None means the primary
+_read_db = ContextVar('read_db', default=None)
+# Set for the rest of a request whose client (or the site) wrote too recently
+_pinned = ContextVar('pinned_to_primary', default=False)
+# {'wrote': bool} for the current request, flipped by db_for_write()
+_request_writes = ContextVar('request_writes', default=None)
+
+LAST_WRITE_KEY = 'db:last_content_write'
+
+
+def pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+
+
+def choose_replica():
+    """A replica alias, or None without replicas or while pinned to the primary."""
+    replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+    if not replicas or _pinned.get():
+        return None
+    return random.choice(replicas)
+
+
+@contextmanager
+def read_from_replica():
+    token = _read_db.set(choose_replica())
+    try:
+        yield
+    finally:
+        _read_db.reset(token)
+
+
+def note_content_write():
+    """
+    Record that CMS content just changed (called from users/signals.py).
+    Cached pages, snapshots and API responses are rebuilt from whatever the
+    next request reads, so replicas are skipped until they have caught up.
+    """
+    if getattr(settings, 'DATABASE_REPLICAS', []):
+        cache.set(LAST_WRITE_KEY, time.time(), pin_seconds())
+
+
+def content_written_recently():
+    return cache.get(LAST_WRITE_KEY) is not None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_db.get() or 'default'
+
+    def db_for_write(self, model, **hints):
+        writes = _request_writes.get()
+        if writes is not None:
+            writes['wrote'] = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema by replicating the primary
+        return db == 'default'
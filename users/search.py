@@ -0,0 +1,187 @@
+"""
+Full-text search over CategoryPost/WidgetPost, through the SearchDocument
+table and the vendor index migration 0067 builds on it:
+
+- SQLite: an external-content FTS5 table, ranked with bm25()
+- PostgreSQL: a generated tsvector column with a GIN index, ranked with ts_rank()
+- anything else: icontains on the documents, newest first
+
+Usage:
+    results = search_posts('pricing plans', kind='category')
+    page = Paginator(results, 20).page(1)
+    posts = load_posts(page.object_list)
+"""
+import html
+import re
+from django.db import connections, router
+from django.db.models import Q
+from django.utils.html import strip_tags
+from .models import SearchDocument, SECTION_MODELS
+
+
+FTS_TABLE = f'{SearchDocument._meta.db_table}_fts'
+# Relative weight of a hit in the title, excerpt and body
+WEIGHTS = (10.0, 4.0, 1.0)
+WORDS = re.compile(r'\w+')
+
+
+# --- Indexing ---
+
+def document_fields(post):
+    return {
+        'title': post.title or '',
+        'excerpt': strip_tags(post.excerpt or ''),
+        'body': html.unescape(strip_tags(post.content or '')),
+        'is_published': post.is_published,
+    }
+
+
+def index_post(post):
+    """Create or refresh the search document of a saved post."""
+    SearchDocument.objects.update_or_create(kind=post.parent_field, post_id=post.pk, defaults=document_fields(post))
+
+
+def remove_post(post):
+    SearchDocument.objects.filter(kind=post.parent_field, post_id=post.pk).delete()
+
+
+def hide_section(kind, parent_id):
+    """Drop a category/widget's posts from public results (it's being deleted)."""
+    parent_model, post_model = SECTION_MODELS[kind]
+    post_ids = post_model.objects.filter(**{post_model.parent_field: parent_id}).values('pk')
+    SearchDocument.objects.filter(kind=kind, post_id__in=post_ids, is_published=True).update(is_published=False)
+
+
+def show_section(kind, parent_id):
+    """Undo hide_section() for the section's published posts."""
+    parent_model, post_model = SECTION_MODELS[kind]
+    post_ids = post_model.objects.filter(**{post_model.parent_field: parent_id, 'is_published': True}).values('pk')
+    SearchDocument.objects.filter(kind=kind, post_id__in=post_ids, is_published=False).update(is_published=True)
+
+
+# --- Querying ---
+
+def fts5_query(query):
+    """
+    Turn free text into an FTS5 MATCH expression: every word must appear, the
+    last one as a prefix (search-as-you-type). Quoting each word keeps FTS5
+    operators and punctuation in user input from being parsed as syntax.
+    """
+    words = WORDS.findall(query)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"' for word in words) + '*'
+
+
+class SearchResults:
+    """
+    Ranked SearchDocuments matching a query. Lazy and sliceable with a
+    count(), so it can go straight into a Paginator: each page is one ranked
+    LIMIT/OFFSET query over the index plus a primary-key fetch.
+    """
+    def __init__(self, query, kind=None, published=True):
+        self.query = query.strip()
+        self.kind = kind
+        self.published = published
+        self.db = router.db_for_read(SearchDocument)
+        self.vendor = connections[self.db].vendor
+        self._count = None
+        # Nothing searchable (e.g. only punctuation) matches nothing
+        self.empty = not self.query or (self.vendor == 'sqlite' and fts5_query(self.query) is None)
+
+    def filters(self):
+        sql, params = [], []
+        if self.kind:
+            sql.append('d.kind = %s')
+            params.append(self.kind)
+        if self.published:
+            sql.append('d.is_published = %s')
+            params.append(True)
+        return ''.join(f' AND {clause}' for clause in sql), params
+
+    def ranked_sql(self):
+        """Return (FROM/WHERE sql, params, ORDER BY sql, params), or None without an FTS index."""
+        table = SearchDocument._meta.db_table
+        extra, extra_params = self.filters()
+        if self.vendor == 'sqlite':
+            weights = ', '.join(str(weight) for weight in WEIGHTS)
+            return (
+                f'FROM {FTS_TABLE} JOIN {table} d ON d.id = {FTS_TABLE}.rowid WHERE {FTS_TABLE} MATCH %s{extra}',
+                [fts5_query(self.query), *extra_params],
+                f'bm25({FTS_TABLE}, {weights}), d.id',
+                [],
+            )
+        if self.vendor == 'postgresql':
+            return (
+                f"FROM {table} d WHERE d.search_vector @@ websearch_to_tsquery('english', %s){extra}",
+                [self.query, *extra_params],
+                "ts_rank(d.search_vector, websearch_to_tsquery('english', %s)) DESC, d.id",
+                [self.query],
+            )
+        return None
+
+    def fallback(self):
+        docs = SearchDocument.objects.using(self.db).filter(Q(title__icontains=self.query) | Q(body__icontains=self.query))
+        if self.kind:
+            docs = docs.filter(kind=self.kind)
+        if self.published:
+            docs = docs.filter(is_published=True)
+        return docs.order_by('-updated_at', '-id')
+
+    def count(self):
+        if self._count is None:
+            self._count = self._fetch_count()
+        return self._count
+
+    def _fetch_count(self):
+        if self.empty:
+            return 0
+        ranked = self.ranked_sql()
+        if ranked is None:
+            return self.fallback().count()
+        where, params, _, _ = ranked
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) {where}', params)
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        if stop is None:
+            stop = self.count()
+        if self.empty or stop <= start:
+            return []
+
+        ranked = self.ranked_sql()
+        if ranked is None:
+            return list(self.fallback()[start:stop])
+
+        where, params, order, order_params = ranked
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(f'SELECT d.id {where} ORDER BY {order} LIMIT %s OFFSET %s', [*params, *order_params, stop - start, start])
+            ids = [row[0] for row in cursor.fetchall()]
+        documents = SearchDocument.objects.using(self.db).in_bulk(ids)
+        return [documents[pk] for pk in ids if pk in documents]
+
+    def post_ids(self, limit=1000):
+        """Post ids of the best `limit` matches (for filtering an existing queryset)."""
+        return [doc.post_id for doc in self[:limit]]
+
+
+def search_posts(query, kind=None, published=True):
+    return SearchResults(query, kind=kind, published=published)
+
+
+def load_posts(documents):
+    """The posts behind a page of SearchDocuments, in the same order, each with its parent loaded."""
+    posts = {}
+    for kind, (parent_model, post_model) in SECTION_MODELS.items():
+        ids = [doc.post_id for doc in documents if doc.kind == kind]
+        if ids:
+            rows = post_model.objects.filter(pk__in=ids).select_related(post_model.parent_field)
+            posts.update({(kind, post.pk): post for post in rows})
+    return [posts[(doc.kind, doc.post_id)] for doc in documents if (doc.kind, doc.post_id) in posts]
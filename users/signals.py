@@ -0,0 +1,202 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db import connections, transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from .models import AppVariable, Category, CategoryPost, CustomUser, Role, Widget, WidgetPost, Tag
+from .cache import bump_content_version, bump_permissions_version, bump_section_version, invalidate_app_settings
+from .search import index_post, remove_post
+from .routers import note_content_write
+from .counters import COUNTERS, adjust
+from .mixins import remember_role_permissions
+
+
+# Models whose rows end up on public pages. Saving or deleting any of them
+# invalidates everything cached under the current content version.
+CONTENT_MODELS = (AppVariable, Category, CategoryPost, Widget, WidgetPost)
+
+
+def _parent_slug(instance, parent_field, parent_model):
+    # Use the cached parent when the caller already loaded it (the usual case for saves)
+    if parent_field in instance._state.fields_cache:
+        return getattr(instance, parent_field).slug
+    return parent_model.objects.filter(pk=getattr(instance, f'{parent_field}_id')).values_list('slug', flat=True).first()
+
+
+def get_section(sender, instance):
+    """Return the (kind, slug) section a saved/deleted row belongs to, if any."""
+    if sender is Category:
+        return ('category', instance.slug)
+    if sender is Widget:
+        return ('widget', instance.slug)
+    if sender is CategoryPost:
+        return ('category', _parent_slug(instance, 'category', Category))
+    if sender is WidgetPost:
+        return ('widget', _parent_slug(instance, 'widget', Widget))
+    return None
+
+
+def remember_old_section(sender, instance, raw=False, update_fields=None, **kwargs):
+    # A post moved to another category/widget leaves its old section stale too
+    instance._old_section = None
+    fk = sender.parent_field
+    if raw or instance._state.adding or (update_fields is not None and fk not in update_fields):
+        return
+    slug = sender._base_manager.filter(pk=instance.pk).values_list(f'{fk}__slug', flat=True).first()
+    instance._old_section = (fk, slug)
+
+
+def content_changed(sender, instance, **kwargs):
+    sections = {get_section(sender, instance), instance.__dict__.pop('_old_section', None)}
+    sections = [section for section in sections if section and section[1]]
+
+    def bump():
+        note_content_write()
+        bump_content_version()
+        if sender is AppVariable:
+            invalidate_app_settings()
+        # The next page read rebuilds the sections' snapshots (portech/sections.py)
+        for section in sections:
+            bump_section_version(*section)
+
+    # Bump after commit so no request can cache the old rows under the new version
+    transaction.on_commit(bump)
+
+
+for model in CONTENT_MODELS:
+    post_save.connect(content_changed, sender=model, dispatch_uid=f'content_changed_save_{model.__name__}')
+    post_delete.connect(content_changed, sender=model, dispatch_uid=f'content_changed_delete_{model.__name__}')
+for model in (CategoryPost, WidgetPost):
+    pre_save.connect(remember_old_section, sender=model, dispatch_uid=f'remember_old_section_{model.__name__}')
+
+
+def sync_post_tags(sender, instance, update_fields=None, **kwargs):
+    # Saves that touch neither the tags nor visibility can't change tag links/counts
+    if update_fields is not None and not {'tags', 'is_published'} & set(update_fields):
+        return
+    Tag.sync(instance)
+
+
+def remember_post_tags(sender, instance, **kwargs):
+    # The link rows go with the post, so note its tags while they still exist
+    instance._deleted_tag_ids = set(instance.tag_set.values_list('pk', flat=True))
+
+
+def recount_post_tags(sender, instance, **kwargs):
+    Tag.refresh_counts(getattr(instance, '_deleted_tag_ids', ()))
+
+
+for model in (CategoryPost, WidgetPost):
+    post_save.connect(sync_post_tags, sender=model, dispatch_uid=f'sync_post_tags_{model.__name__}')
+    pre_delete.connect(remember_post_tags, sender=model, dispatch_uid=f'remember_post_tags_{model.__name__}')
+    post_delete.connect(recount_post_tags, sender=model, dispatch_uid=f'recount_post_tags_{model.__name__}')
+
+
+def update_search_document(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'title', 'excerpt', 'content', 'is_published'} & set(update_fields):
+        return
+    index_post(instance)
+
+
+def delete_search_document(sender, instance, **kwargs):
+    remove_post(instance)
+
+
+for model in (CategoryPost, WidgetPost):
+    post_save.connect(update_search_document, sender=model, dispatch_uid=f'update_search_document_{model.__name__}')
+    post_delete.connect(delete_search_document, sender=model, dispatch_uid=f'delete_search_document_{model.__name__}')
+
+
+# Child model -> (parent model, counter field, foreign key field)
+COUNTED_CHILDREN = {child: (parent, field, fk) for parent, field, child, fk in COUNTERS}
+
+
+def remember_counted_parent(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Note the parent the row had before this save, so moving it moves the count
+    parent_model, field, fk = COUNTED_CHILDREN[sender]
+    instance._counted_parent_id = None
+    if raw or instance._state.adding or (update_fields is not None and fk not in update_fields):
+        return
+    attname = sender._meta.get_field(fk).attname
+    instance._counted_parent_id = sender._base_manager.filter(pk=instance.pk).values_list(attname, flat=True).first()
+
+
+def count_saved_child(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    parent_model, field, fk = COUNTED_CHILDREN[sender]
+    current = getattr(instance, sender._meta.get_field(fk).attname)
+    if created:
+        adjust(parent_model, field, current, 1)
+        return
+    previous = getattr(instance, '_counted_parent_id', None)
+    if update_fields is not None and fk not in update_fields or previous == current:
+        return
+    adjust(parent_model, field, previous, -1)
+    adjust(parent_model, field, current, 1)
+
+
+def count_deleted_child(sender, instance, **kwargs):
+    parent_model, field, fk = COUNTED_CHILDREN[sender]
+    adjust(parent_model, field, getattr(instance, sender._meta.get_field(fk).attname), -1)
+
+
+for model in COUNTED_CHILDREN:
+    pre_save.connect(remember_counted_parent, sender=model, dispatch_uid=f'remember_counted_parent_{model.__name__}')
+    post_save.connect(count_saved_child, sender=model, dispatch_uid=f'count_saved_child_{model.__name__}')
+    post_delete.connect(count_deleted_child, sender=model, dispatch_uid=f'count_deleted_child_{model.__name__}')
+
+
+def detach_subordinates(sender, instance, **kwargs):
+    # assigned_to is SET_NULL: the deleted user's direct reports become the
+    # top of their own chains, so drop its path prefix from the whole subtree
+    if instance.hierarchy_path:
+        CustomUser.rebase_subtree(instance.hierarchy_path, '', -(len(instance.hierarchy_path) // 32))
+
+
+post_delete.connect(detach_subordinates, sender=CustomUser, dispatch_uid='detach_subordinates')
+
+
+def place_loaded_users(sender, instance, raw=False, using=None, **kwargs):
+    # Fixture rows are saved raw, so CustomUser.save() never placed them, and
+    # a user can arrive before their manager: rebuild once the load commits
+    if not raw or any(getattr(func, 'places_loaded_users', False) for _, func, _ in connections[using].run_on_commit):
+        return
+
+    def rebuild():
+        CustomUser.rebuild_hierarchy(using=using)
+    rebuild.places_loaded_users = True
+    transaction.on_commit(rebuild, using=using)
+
+
+post_save.connect(place_loaded_users, sender=CustomUser, dispatch_uid='place_loaded_users')
+
+
+# Fields of a user that feed users.mixins.resolve_role_permissions
+PERMISSION_USER_FIELDS = {'role', 'is_superuser'}
+
+
+def cache_permissions_at_login(sender, request, user, **kwargs):
+    remember_role_permissions(request, user)
+
+
+def remember_user_permissions(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Note whether this save changes what the user may do, so profile and
+    # password saves leave everyone's cached permissions alone
+    instance._permissions_changed = False
+    if raw or instance._state.adding or (update_fields is not None and not PERMISSION_USER_FIELDS & set(update_fields)):
+        return
+    stored = CustomUser._base_manager.filter(pk=instance.pk).values_list('role_id', 'is_superuser').first()
+    instance._permissions_changed = stored != (instance.role_id, instance.is_superuser)
+
+
+def role_permissions_changed(sender, instance, **kwargs):
+    # New users have no session yet
+    if sender is CustomUser and not getattr(instance, '_permissions_changed', False):
+        return
+    transaction.on_commit(bump_permissions_version)
+
+
+user_logged_in.connect(cache_permissions_at_login, dispatch_uid='cache_permissions_at_login')
+pre_save.connect(remember_user_permissions, sender=CustomUser, dispatch_uid='remember_user_permissions')
+for model in (Role, CustomUser):
+    post_save.connect(role_permissions_changed, sender=model, dispatch_uid=f'role_permissions_changed_{model.__name__}')
+post_delete.connect(role_permissions_changed, sender=Role, dispatch_uid='role_permissions_changed_Role_delete')
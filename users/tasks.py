@@ -1,6 +1,9 @@
 import logging
-from celery import shared_task, group
+import os
+from celery import current_app, shared_task, group
 from django.apps import apps
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
 from django.utils import timezone
 from django.core.mail import EmailMessage, send_mail
 from .models import NewsPost
@@ -64,6 +67,138 @@ def send_broadcast_task(post_id, recipient_list, from_email, subject=None):
 
 
 
+# Publisher connection that gives up at once instead of kombu's default retries
+FAIL_FAST_TRANSPORT = {'max_retries': 1, 'interval_start': 0, 'interval_step': 0}
+
+
+def queue_fail_fast(task, *args):
+    """
+    Queue `task`, raising right away when the broker is unreachable (callers
+    fall back to running it inline). The result isn't waited on, so the
+    result backend isn't touched either.
+    """
+    with current_app.connection_for_write(transport_options=FAIL_FAST_TRANSPORT) as connection:
+        return task.apply_async(args, connection=connection, retry=False, ignore_result=True)
+
+
+# Posts removed per transaction by delete_section
+DELETE_BATCH_SIZE = 500
+
+
+def remove_empty_folders(folders, root):
+    """
+    On local storage, remove the given upload folders and their parents below
+    root, deepest first, as long as they are empty. Never removes root itself
+    or anything that still holds a file.
+    """
+    pending = set()
+    for folder in folders:
+        while folder.startswith(root + '/'):
+            pending.add(folder)
+            folder = os.path.dirname(folder)
+    for folder in sorted(pending, key=lambda folder: folder.count('/'), reverse=True):
+        try:
+            os.rmdir(default_storage.path(folder))
+        except NotImplementedError:
+            return
+        except OSError:
+            pass  # Not empty, or already gone
+
+
+@shared_task(bind=True)
+def delete_section(self, kind, pk):
+    """
+    Delete a category/widget marked is_pending_delete together with its posts.
+    Posts go DELETE_BATCH_SIZE at a time with raw DELETEs (their tag links and
+    search documents first) instead of through Django's in-memory collector,
+    and their uploaded files are removed from storage. Reports PROGRESS with
+    {'deleted', 'total'} after every batch.
+    """
+    from .models import SECTION_MODELS, SearchDocument, Tag
+
+    parent_model, post_model = SECTION_MODELS[kind]
+    parent = parent_model.objects.filter(pk=pk, is_pending_delete=True).first()
+    if parent is None:
+        return f"No pending {kind} #{pk}"
+
+    posts = post_model.objects.filter(**{post_model.parent_field: parent}).order_by()
+    tag_links = post_model.tag_set.through.objects
+    link_field = f'{post_model._meta.model_name}_id__in'
+    total, deleted, tag_ids, folders = posts.count(), 0, set(), set()
+
+    while True:
+        rows = list(posts.values_list('pk', 'image', 'video', 'audio')[:DELETE_BATCH_SIZE])
+        if not rows:
+            break
+        ids = [row[0] for row in rows]
+        with transaction.atomic():
+            links = tag_links.filter(**{link_field: ids})
+            tag_ids.update(links.values_list('tag_id', flat=True))
+            for batch in (links, SearchDocument.objects.filter(kind=kind, post_id__in=ids), post_model.objects.filter(pk__in=ids)):
+                batch._raw_delete(batch.db)
+
+        for name in (name for row in rows for name in row[1:] if name):
+            try:
+                default_storage.delete(name)
+                folders.add(os.path.dirname(name))
+            except OSError as e:
+                logger.warning(f"Could not delete {name}: {e}")
+
+        deleted += len(ids)
+        # Eager runs (the inline fallback) have nowhere to report to
+        if self.request.id and not self.request.is_eager:
+            self.update_state(state='PROGRESS', meta={'deleted': deleted, 'total': total})
+        logger.info(f"Deleting {kind}:{parent.slug}: {deleted}/{total} posts")
+
+    Tag.refresh_counts(tag_ids)
+    remove_empty_folders(folders, post_model.media_dir)
+    if parent.media_file:
+        parent.media_file.delete(save=False)
+    parent.delete()
+    return f"Deleted {kind}:{parent.slug} and {deleted} posts"
+
+
+# ----------------------------------------------------
+# SQLITE MAINTENANCE (scheduled in CELERY_BEAT_SCHEDULE)
+# ----------------------------------------------------
+def _sqlite_cursor():
+    connection = connections['default']
+    return connection.cursor() if connection.vendor == 'sqlite' else None
+
+
+@shared_task
+def optimize_database(full=False):
+    """
+    Refresh the query planner's statistics. PRAGMA optimize only re-analyzes
+    tables whose stats have drifted; full=True runs a complete ANALYZE.
+    """
+    cursor = _sqlite_cursor()
+    if cursor is None:
+        return "Not SQLite, skipped"
+    with cursor:
+        cursor.execute('ANALYZE' if full else 'PRAGMA optimize')
+    return "Analyzed" if full else "Optimized"
+
+
+@shared_task
+def checkpoint_database(mode='PASSIVE'):
+    """
+    Copy the WAL back into the database file. PASSIVE never blocks anyone;
+    TRUNCATE waits for readers and then shrinks the -wal file to zero.
+    """
+    if mode not in ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'):
+        raise ValueError(f"Unknown checkpoint mode {mode!r}")
+    cursor = _sqlite_cursor()
+    if cursor is None:
+        return "Not SQLite, skipped"
+    with cursor:
+        cursor.execute(f'PRAGMA wal_checkpoint({mode})')
+        busy, wal_pages, copied = cursor.fetchone()
+    if busy:
+        logger.warning(f"WAL checkpoint ({mode}) was blocked; {copied}/{wal_pages} pages copied")
+    return f"Checkpoint {mode}: {copied}/{wal_pages} pages"
+
+
 @shared_task
 def check_scheduled_broadcasts():
     """Celery Beat task to check for scheduled posts. Uses 'users' app label."""
@@ -1,8 +1,11 @@
 from django import template
+from django.conf import settings
+from django.core.cache import cache
 from django.utils.safestring import mark_safe
 from django.forms.widgets import ClearableFileInput
 import builtins
 from users.models import POST_FIELD_CHOICES
+from users.cache import get_section_version
 
 register = template.Library()
 
@@ -72,6 +75,45 @@ def get_gallery_images(post):
         return post.images.filter(order__gt=0).order_by('order')
     return []
 
+# --- Section Fragment Cache ---
+
+class CacheSectionNode(template.Node):
+    def __init__(self, nodelist, slug, kind):
+        self.nodelist = nodelist
+        self.slug = slug
+        self.kind = kind
+
+    def render(self, context):
+        slug = self.slug.resolve(context)
+        kind = self.kind.resolve(context) if self.kind else 'category'
+        # Template and line tell apart two fragments of the same section (e.g. FAQ on Home and About)
+        key = f'fragment:{kind}:{slug}:{get_section_version(kind, slug)}:{self.origin.template_name}:{self.token.lineno}'
+        html = cache.get(key)
+        if html is None:
+            html = self.nodelist.render(context)
+            # Only views that loaded this section (context['sections']) may
+            # store it; any other render of the template lacks its data
+            sections = context.get('sections')
+            if sections is not None and sections.provides(kind, slug):
+                cache.set(key, html, getattr(settings, 'PORTECH_PAGE_CACHE_TIMEOUT', 60 * 60 * 24))
+        return html
+
+@register.tag(name='cache_section')
+def cache_section(parser, token):
+    """
+    Cache the rendered HTML of one category/widget section until that parent
+    or one of its posts is saved or deleted.
+    Usage: {% cache_section "faq" %}...{% end_cache_section %}
+           {% cache_section "home-slider" "widget" %}...{% end_cache_section %}
+    """
+    bits = token.split_contents()
+    if len(bits) not in (2, 3):
+        raise template.TemplateSyntaxError(f"'{bits[0]}' takes a slug and an optional kind ('category' or 'widget').")
+    nodelist = parser.parse(('end_cache_section',))
+    parser.delete_first_token()
+    kind = parser.compile_filter(bits[2]) if len(bits) == 3 else None
+    return CacheSectionNode(nodelist, parser.compile_filter(bits[1]), kind)
+
 # --- Media Utilities ---
 
 @register.filter
@@ -1,3 +1,374 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import skipUnless
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core import serializers
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from portech.sections import load_sections
+from .middleware import ReplicaRoutingMiddleware
+from .mixins import get_role_permissions, has_role_permission, remember_role_permissions
+from .cache import get_permissions_version, get_section_version
+from .counters import reconcile
+from .models import Category, CategoryPost, CustomUser, PublishedSection, Role, Widget, WidgetPost
+from .tasks import delete_section
+from .utils import next_free_slug
+from .routers import LAST_WRITE_KEY, ReplicaRouter, note_content_write, read_from_replica
 
-# Create your tests here.
+
+@skipUnless(connection.vendor == 'sqlite', "Reads SQLite's EXPLAIN QUERY PLAN output")
+class PostListingIndexTests(TestCase):
+    """The hot post listings must be served by an index, not a table scan plus sort."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(title='FAQ', child_fields=['title', 'excerpt'])
+        cls.other_category = Category.objects.create(title='Skills', child_fields=['title'])
+        cls.widget = Widget.objects.create(title='Home Slider', child_fields=['title', 'image'])
+        for i in range(20):
+            CategoryPost.objects.create(title=f'Question {i}', category=cls.category, is_published=i % 4 != 0)
+            CategoryPost.objects.create(title=f'Skill {i}', category=cls.other_category)
+            WidgetPost.objects.create(title=f'Slide {i}', widget=cls.widget, is_published=i % 4 != 0)
+
+    def assertIndexed(self, queryset):
+        plan = queryset.explain()
+        table = queryset.model._meta.db_table
+        for line in plan.splitlines():
+            self.assertNotIn('USE TEMP B-TREE', line, f"Sorts in a temp B-tree:\n{plan}")
+            if table in line:
+                self.assertIn('USING', line, f"Full scan of {table}:\n{plan}")
+
+    def test_public_section_listing(self):
+        self.assertIndexed(CategoryPost.objects.for_display(self.category).filter(is_published=True))
+        self.assertIndexed(WidgetPost.objects.for_display(self.widget).filter(is_published=True))
+
+    def test_grouped_section_listing(self):
+        self.assertIndexed(CategoryPost.objects.for_display(self.category, self.other_category).filter(is_published=True))
+
+    def test_admin_post_list(self):
+        self.assertIndexed(CategoryPost.objects.for_display(self.category).select_related('author').order_by('-created_at'))
+        self.assertIndexed(WidgetPost.objects.for_display(self.widget).select_related('author').order_by('-created_at'))
+
+    def test_api_keyset_page(self):
+        last = CategoryPost.objects.filter(category=self.category).order_by('-created_at', '-id')[5]
+        after = Q(created_at__lt=last.created_at) | Q(created_at=last.created_at, id__lt=last.id)
+        self.assertIndexed(
+            CategoryPost.objects.for_display(self.category).filter(is_published=True).order_by('-created_at', '-id').filter(after)[:21]
+        )
+        self.assertIndexed(
+            WidgetPost.objects.for_display(self.widget).filter(is_published=True).order_by('-created_at', '-id')[:21]
+        )
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICA_READ_NAMESPACES=['portech'])
+class ReplicaRoutingTests(SimpleTestCase):
+    """Public reads go to the replica; writers and fresh content stay on the primary."""
+    router = ReplicaRouter()
+
+    def setUp(self):
+        cache.delete(LAST_WRITE_KEY)
+
+    def handle(self, request, write=False):
+        seen = {}
+
+        def view(request):
+            seen['read'] = self.router.db_for_read(Category)
+            if write:
+                seen['write'] = self.router.db_for_write(Category)
+            return HttpResponse()
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        request.resolver_match = resolve(request.path)
+        request.user = AnonymousUser()
+        response = middleware(request)
+        return seen, response
+
+    def test_read_from_replica(self):
+        self.assertEqual(self.router.db_for_read(Category), 'default')
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_read(Category), 'replica1')
+            self.assertEqual(self.router.db_for_write(Category), 'default')
+        self.assertEqual(self.router.db_for_read(Category), 'default')
+
+    def test_public_get_reads_replica(self):
+        seen, response = self.handle(RequestFactory().get('/about/'))
+        self.assertEqual(seen['read'], 'replica1')
+        self.assertEqual(self.router.db_for_read(Category), 'default')
+
+    def test_write_pins_client_to_primary(self):
+        seen, response = self.handle(RequestFactory().post('/ExternalSubcrib/'), write=True)
+        self.assertEqual(seen['read'], 'default')
+        self.assertIn(ReplicaRoutingMiddleware.cookie_name, response.cookies)
+
+        request = RequestFactory().get('/about/')
+        request.COOKIES[ReplicaRoutingMiddleware.cookie_name] = '1'
+        self.assertEqual(self.handle(request)[0]['read'], 'default')
+
+    def test_recent_content_write_pins_everyone(self):
+        note_content_write()
+        self.assertEqual(self.handle(RequestFactory().get('/about/'))[0]['read'], 'default')
+
+
+class UserHierarchyTests(TestCase):
+    """hierarchy_path follows assigned_to through creates, moves and deletes."""
+
+    def make_user(self, name, manager=None):
+        return CustomUser.objects.create_user(email=f'{name}@example.com', username=name, password='x', assigned_to=manager)
+
+    def setUp(self):
+        self.boss = self.make_user('boss')
+        self.manager = self.make_user('manager', self.boss)
+        self.staff = self.make_user('staff', self.manager)
+        self.other = self.make_user('other')
+
+    def names(self, users):
+        return [user.username for user in users]
+
+    def test_subtree_and_ancestors(self):
+        self.assertEqual(self.names(self.boss.get_descendants()), ['manager', 'staff'])
+        self.assertEqual(self.names(self.staff.get_ancestors()), ['boss', 'manager'])
+        self.assertEqual(self.staff.hierarchy_depth, 2)
+        with self.assertNumQueries(1):
+            list(self.boss.get_descendants())
+
+    def test_moving_a_manager_moves_their_reports(self):
+        self.manager.assigned_to = self.other
+        self.manager.save()
+        self.staff.refresh_from_db()
+        self.assertEqual(self.names(self.staff.get_ancestors()), ['other', 'manager'])
+        self.assertEqual(self.names(self.boss.get_descendants()), [])
+
+    def test_reporting_loops_are_rejected(self):
+        self.boss.assigned_to = self.staff
+        with self.assertRaises(ValidationError):
+            self.boss.save()
+
+    def test_unplaced_users_see_nobody(self):
+        CustomUser.objects.filter(pk=self.boss.pk).update(hierarchy_path='')
+        self.boss.refresh_from_db()
+        self.assertEqual(list(self.boss.get_descendants()), [])
+
+    def test_rebuild_places_users_written_without_save(self):
+        CustomUser.objects.filter(pk=self.other.pk).update(assigned_to=self.staff)
+        CustomUser.objects.update(hierarchy_path='', hierarchy_depth=0)
+        self.assertEqual(CustomUser.rebuild_hierarchy(), 4)
+        self.boss.refresh_from_db()
+        self.assertEqual(self.names(self.boss.get_descendants()), ['manager', 'staff', 'other'])
+
+    def test_loaded_fixtures_are_placed_on_commit(self):
+        users = list(CustomUser.objects.order_by('-hierarchy_depth'))
+        for user in users:
+            user.hierarchy_path, user.hierarchy_depth = '', 0
+        fixture = Path(tempfile.mkdtemp(), 'users.json')
+        self.addCleanup(shutil.rmtree, fixture.parent)
+        fixture.write_text(serializers.serialize('json', users))
+        CustomUser.objects.all().delete()
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            call_command('loaddata', fixture, verbosity=0)
+        self.assertEqual(sum(getattr(func, 'places_loaded_users', False) for func in callbacks), 1)
+        self.boss.refresh_from_db()
+        self.assertEqual(self.names(self.boss.get_descendants()), ['manager', 'staff'])
+
+    def test_deleting_a_manager_detaches_their_reports(self):
+        self.manager.delete()
+        self.staff.refresh_from_db()
+        self.assertEqual(self.staff.hierarchy_depth, 0)
+        self.assertEqual(self.names(self.boss.get_descendants()), [])
+
+
+class RolePermissionCacheTests(TestCase):
+    """Guarded views read role permissions from the session until a role changes."""
+
+    def setUp(self):
+        cache.clear()
+        self.role = Role.objects.create(name='Desk Manager', can_assign_staff=True)
+        self.user = CustomUser.objects.create_user(email='desk@example.com', username='desk', password='x')
+        self.user.role = self.role
+        self.user.save()
+        self.request = RequestFactory().get('/bg-admin/')
+        self.request.session = SessionStore()
+        self.request.user = CustomUser.objects.get(pk=self.user.pk)
+        remember_role_permissions(self.request, self.request.user)
+
+    def test_cached_checks_skip_the_role_query(self):
+        self.request.user = CustomUser.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(has_role_permission(self.request, 'can_assign_staff'))
+            self.assertFalse(has_role_permission(self.request, 'can_create_user'))
+            self.assertEqual(get_role_permissions(self.request)['role'], 'desk-manager')
+
+    def test_role_save_refreshes_the_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.role.can_create_user = True
+            self.role.save()
+        self.request.user = CustomUser.objects.get(pk=self.user.pk)
+        self.assertTrue(has_role_permission(self.request, 'can_create_user'))
+
+    def test_role_change_on_the_user_refreshes_the_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.role = None
+            self.user.save()
+        self.request.user = CustomUser.objects.get(pk=self.user.pk)
+        self.assertFalse(has_role_permission(self.request, 'can_assign_staff'))
+
+    def test_profile_saves_keep_the_cache(self):
+        version = get_permissions_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Desk'
+            self.user.save()
+            self.user.set_password('y')
+            self.user.save(update_fields=['password'])
+        self.assertEqual(get_permissions_version(), version)
+
+
+class DeleteSectionTests(TestCase):
+    """Background deletes remove the section's uploads and nothing else."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def make_post(self, category, title):
+        return CategoryPost.objects.create(
+            title=title, category=category, image=SimpleUploadedFile('photo.jpg', b'not really a jpeg'),
+        )
+
+    def test_title_without_a_slug_keeps_other_sections_files(self):
+        doomed = Category.objects.create(title='关于我们', child_fields=['title', 'image'])
+        faq = Category.objects.create(title='FAQ', child_fields=['title', 'image'])
+        gone = self.make_post(doomed, 'Team')
+        kept = self.make_post(faq, 'Pricing')
+        Category.objects.filter(pk=doomed.pk).update(is_pending_delete=True)
+
+        delete_section.apply(args=('category', doomed.pk))
+
+        self.assertFalse(Category.objects.filter(pk=doomed.pk).exists())
+        self.assertFalse(default_storage.exists(gone.image.name))
+        self.assertTrue(default_storage.exists(kept.image.name))
+
+    def test_confirmation_form_hides_instead_of_deleting_inline(self):
+        faq = Category.objects.create(title='FAQ', child_fields=['title', 'image'])
+        post = self.make_post(faq, 'Pricing')
+        self.client.force_login(CustomUser.objects.create_user(email='admin@example.com', username='admin', password='x'))
+
+        with self.captureOnCommitCallbacks(execute=False):
+            response = self.client.post(reverse('users:category_delete', args=[faq.slug]))
+
+        self.assertRedirects(response, reverse('users:category_list'), fetch_redirect_response=False)
+        self.assertTrue(Category.objects.get(pk=faq.pk).is_pending_delete)
+        self.assertTrue(CategoryPost.objects.filter(pk=post.pk).exists())
+
+
+class SectionInvalidationTests(TestCase):
+    """Saves retire the cached fragments, snapshots and ETags of every section they touch."""
+
+    def setUp(self):
+        cache.clear()
+        self.faq = Category.objects.create(title='FAQ', child_fields=['title'])
+        self.why = Category.objects.create(title='Why Choose Us', child_fields=['title'])
+        self.post = CategoryPost.objects.create(title='Pricing', category=self.faq, is_published=True)
+
+    def test_moving_a_post_refreshes_both_sections(self):
+        before = {slug: get_section_version('category', slug) for slug in ('faq', 'why-choose-us')}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.category = self.why
+            self.post.save()
+
+        for slug, version in before.items():
+            self.assertNotEqual(get_section_version('category', slug), version, slug)
+        sections = load_sections(['faq', 'why-choose-us'])
+        self.assertEqual(sections.get('category', 'faq').posts, [])
+        self.assertEqual([post.title for post in sections.get('category', 'why-choose-us').posts], ['Pricing'])
+
+    def test_stale_snapshots_are_rebuilt_in_one_write(self):
+        with CaptureQueriesContext(connection) as queries:
+            load_sections(['faq', 'why-choose-us']).get('category', 'faq')
+        writes = [query['sql'] for query in queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(PublishedSection.objects.count(), 2)
+
+
+class UniqueSlugTests(TestCase):
+    """Slug numbering only reads the slugs that share the base."""
+
+    def setUp(self):
+        self.category = Category.objects.create(title='FAQ', child_fields=['title'])
+
+    def test_numbers_past_the_highest_suffix(self):
+        for title in ('Pricing', 'Pricing', 'Pricing plans', 'Pricing'):
+            CategoryPost.objects.create(title=title, category=self.category)
+        CategoryPost.objects.filter(slug='pricing-2').update(slug='pricing-10')
+        self.assertEqual(next_free_slug(CategoryPost, 'pricing'), 'pricing-11')
+        self.assertEqual(next_free_slug(CategoryPost, 'pricing-plans'), 'pricing-plans-1')
+        self.assertEqual(next_free_slug(CategoryPost, 'refunds'), 'refunds')
+
+    @skipUnless(connection.vendor == 'sqlite', "Reads SQLite's EXPLAIN QUERY PLAN output")
+    def test_lookup_is_an_index_range(self):
+        with CaptureQueriesContext(connection) as queries:
+            next_free_slug(CategoryPost, 'pricing')
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + queries[0]['sql'])
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('slug>? AND slug<?', plan)
+        self.assertNotIn('SCAN', plan)
+
+
+class StoredCounterTests(TestCase):
+    """post_count/user_count follow creates, moves and deletes, and survive stale saves."""
+
+    def setUp(self):
+        self.faq = Category.objects.create(title='FAQ', child_fields=['title'])
+        self.why = Category.objects.create(title='Why Choose Us', child_fields=['title'])
+        self.post = CategoryPost.objects.create(title='Pricing', category=self.faq)
+        CategoryPost.objects.create(title='Refunds', category=self.faq)
+
+    def counts(self):
+        return list(Category.objects.order_by('title').values_list('post_count', flat=True))
+
+    def test_signals_follow_creates_moves_and_deletes(self):
+        self.assertEqual(self.counts(), [2, 0])
+        self.post.category = self.why
+        self.post.save()
+        self.assertEqual(self.counts(), [1, 1])
+        self.post.delete()
+        self.assertEqual(self.counts(), [1, 0])
+
+        user = CustomUser.objects.create_user(email='staff@example.com', username='staff', password='x')
+        self.assertEqual(Role.objects.get(slug='client').user_count, 1)
+        user.role = Role.objects.create(name='Editor')
+        user.save()
+        self.assertEqual(dict(Role.objects.filter(slug__in=['client', 'editor']).values_list('slug', 'user_count')), {'client': 0, 'editor': 1})
+
+    def test_full_save_keeps_the_stored_count(self):
+        stale = Category.objects.get(pk=self.faq.pk)
+        CategoryPost.objects.create(title='Shipping', category=self.faq)
+        stale.excerpt = 'Common questions'
+        stale.save()
+        self.faq.refresh_from_db()
+        self.assertEqual((self.faq.excerpt, self.faq.post_count), ('Common questions', 3))
+
+    def test_reconcile_repairs_drift(self):
+        Category.objects.filter(pk=self.faq.pk).update(post_count=7)
+        CategoryPost.objects.filter(pk=self.post.pk).update(category=self.why)
+        self.assertEqual(reconcile()['Category.post_count'], 2)
+        self.assertEqual(self.counts(), [1, 1])
+        self.assertEqual(reconcile()['Category.post_count'], 0)
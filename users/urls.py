@@ -11,6 +11,7 @@ urlpatterns = [
     # =========================================================
     path("", views.IndexView.as_view(), name="index"),
     path('site/settings/', views.SiteSettingsUpdateView.as_view(), name='site_settings'),
+    path('site/cache-stats/', views.CacheStatsView.as_view(), name='cache_stats'),
     
     path('login/', LoginView.as_view(
         template_name='registration/login.html', 
@@ -64,6 +65,9 @@ urlpatterns = [
     path('widget/<slug:widget_slug>/edit/<slug:post_slug>/', views.WidgetPostEditView.as_view(), name='widget_post_edit'),
     path('widget/<slug:widget_slug>/delete/<slug:post_slug>/', views.WidgetPostDeleteView.as_view(), name='widget_post_delete'),
 
+    # --- Search (both kinds) ---
+    path('posts/search/', views.PostSearchView.as_view(), name='post_search'),
+
 
     # ==========================================    
     # Send Emails
@@ -1,3 +1,10 @@
+import re
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.functions import Length
+from django.utils.text import slugify
+
+
 
 
 def get_client_ip(request):
@@ -6,4 +13,51 @@ def get_client_ip(request):
         ip = x_forwarded_for.split(',')[0].strip()
     else:
         ip = request.META.get('REMOTE_ADDR')
-    return ip
\ No newline at end of file
+    return ip
+
+
+def next_free_slug(model, base, field='slug'):
+    """
+    Return `base`, or `base-N` with N one past the highest suffix in use.
+    One query: among slugs shaped like base / base-<digits>, the longest and
+    then greatest is the one with the highest number. Candidates come from
+    an index range (base itself, plus base-0 up to base-:, i.e. "base-"
+    followed by a digit), so only slugs sharing the base are read and
+    sorted, never the whole table.
+    """
+    max_length = model._meta.get_field(field).max_length
+    # Leave room for a "-NNNNNN" suffix on very long titles
+    base = base[:max_length - 7].rstrip('-') if len(base) > max_length - 7 else base
+
+    taken = (
+        model._default_manager
+        .filter(Q(**{field: base}) | Q(**{f'{field}__gte': f'{base}-0', f'{field}__lt': f'{base}-:'}))
+        .filter(**{f'{field}__regex': rf'^{re.escape(base)}(-[0-9]+)?$'})
+        .order_by(Length(field).desc(), f'-{field}')
+        .values_list(field, flat=True)
+        .first()
+    )
+    if taken is None:
+        return base
+    if taken == base:
+        return f'{base}-1'
+    return f'{base}-{int(taken.rsplit("-", 1)[1]) + 1}'
+
+
+def save_with_unique_slug(instance, text, save, *args, attempts=5, **kwargs):
+    """
+    Fill instance.slug from `text` and call `save` (the model's super().save).
+    If a concurrent save grabs the same slug first, the unique index rejects
+    ours; roll back to a savepoint and take the next number.
+    """
+    base = slugify(text) or 'untitled'
+    model = instance._meta.model
+    for attempt in range(attempts):
+        instance.slug = next_free_slug(model, base)
+        try:
+            with transaction.atomic():
+                return save(*args, **kwargs)
+        except IntegrityError:
+            # Some other constraint failed, or we're out of retries
+            if attempt == attempts - 1 or not model._default_manager.filter(slug=instance.slug).exists():
+                raise
@@ -1,4 +1,4 @@
-import csv, io, datetime
+import csv, io, datetime, logging
 from zoneinfo import ZoneInfo
 from django.shortcuts import render, get_object_or_404, redirect
 from django.http import HttpResponseRedirect, Http404, JsonResponse, HttpResponse
@@ -7,8 +7,9 @@ from django.views import View
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView, FormView, DetailView
 from django.conf import settings
 from django.db import transaction
-from django.db.models import Count, Q
+from django.db.models import Q
 from django.contrib import messages
+from django.core.paginator import Paginator
 from django.contrib.messages.views import SuccessMessageMixin
 from django.template.loader import render_to_string
 from django.core.mail import EmailMessage
@@ -16,11 +17,15 @@ from django.utils import timezone
 from django.utils.timezone import make_aware, is_naive, now as timezone_now
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.mixins import UserPassesTestMixin, LoginRequiredMixin
-from .mixins import RolePermissionRequiredMixin, role_permission_required, is_super_admin
-from .models import Category, CategoryPost, Widget, WidgetPost, CustomUser, AppVariable, Role, POST_FIELD_CHOICES, NewsPost, ExternalSubscriber
+from .mixins import RolePermissionRequiredMixin, get_role_permissions, role_permission_required, is_super_admin
+from .models import Category, CategoryPost, Widget, WidgetPost, CustomUser, AppVariable, Role, POST_FIELD_CHOICES, NewsPost, ExternalSubscriber, SECTION_MODELS
 from .forms import CategoryForm, DynamicCategoryPostForm, WidgetForm, DynamicWidgetPostForm, AdminUserCreationForm, SiteSettingsKeyForm, RoleForm, BroadcastForm, Subcribers, CSVUploadForm
-from .tasks import send_broadcast_task 
+from .tasks import send_broadcast_task, delete_section, queue_fail_fast
+from .cache import bump_content_version, get_content_version, get_hit_stats, get_settings_usage
+from .search import hide_section, show_section, search_posts, load_posts
+from .routers import read_from_replica
 utc = datetime.UTC
+logger = logging.getLogger(__name__)
 from zoneinfo import ZoneInfo
 
 
@@ -51,7 +56,7 @@ class CategoryListView(LoginRequiredMixin, ListView):
     context_object_name = 'categories'
 
     def get_queryset(self):
-        return Category.objects.annotate(post_count=Count('posts')).order_by('title')
+        return Category.objects.live().order_by('title')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -73,17 +78,56 @@ class CategoryEditView(LoginRequiredMixin, UpdateView):
     slug_url_kwarg = 'slug'
     success_url = reverse_lazy('users:category_list')
 
-class CategoryDeleteView(LoginRequiredMixin, DeleteView):
-    model = Category
-    slug_url_kwarg = 'slug'
-    success_url = reverse_lazy('users:category_list') 
+class BackgroundDeleteMixin:
+    """
+    Deleting (GET link or the POST confirmation form) hides the
+    category/widget at once (is_pending_delete) and leaves the posts and
+    media to the users.tasks.delete_section Celery task, so big sections
+    don't hold up the request.
+    """
+    kind = None
+    success_message = None
 
     def get(self, request, *args, **kwargs):
         self.object = self.get_object()
-        self.object.delete()
-        messages.success(request, "Category and posts deleted.")
+        return self.start_delete()
+
+    def form_valid(self, form):
+        # DeleteView.post() lands here with self.object set
+        return self.start_delete()
+
+    def start_delete(self):
+        self.object.is_pending_delete = True
+        self.object.save(update_fields=['is_pending_delete', 'updated_at'])
+        kind, pk = self.kind, self.object.pk
+        hide_section(kind, pk)
+        transaction.on_commit(lambda: self.queue_delete(kind, pk))
+        if self.success_message:
+            messages.success(self.request, self.success_message)
         return redirect(self.success_url)
 
+    def queue_delete(self, kind, pk):
+        try:
+            queue_fail_fast(delete_section, kind, pk)
+        except Exception as e:
+            # No broker: do it in this request as before rather than leave it pending
+            logger.warning(f"Could not queue delete of {kind} #{pk}, deleting inline: {e}")
+            result = delete_section.apply(args=(kind, pk))
+            if result.failed():
+                # Put what's left back in sight so the delete can be retried
+                logger.error(f"Deleting {kind} #{pk} failed: {result.result!r}")
+                parent_model = SECTION_MODELS[kind][0]
+                parent_model.objects.filter(pk=pk).update(is_pending_delete=False)
+                show_section(kind, pk)
+                bump_content_version()
+
+class CategoryDeleteView(LoginRequiredMixin, BackgroundDeleteMixin, DeleteView):
+    model = Category
+    slug_url_kwarg = 'slug'
+    success_url = reverse_lazy('users:category_list') 
+    kind = 'category'
+    success_message = "Category is being deleted with its posts."
+
 
 # --- Category Posts ---
 
@@ -94,7 +138,7 @@ class PostListByCategoryView(LoginRequiredMixin, ListView):
 
     def get_queryset(self):
         self.category = get_object_or_404(Category, slug=self.kwargs['category_slug'])
-        return CategoryPost.objects.filter(category=self.category).order_by('-created_at')
+        return CategoryPost.objects.for_display(self.category).select_related('author').order_by('-created_at')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -197,7 +241,7 @@ class WidgetListView(LoginRequiredMixin, ListView):
     context_object_name = 'widgets'
 
     def get_queryset(self):
-        return Widget.objects.annotate(post_count=Count('widget_posts')).order_by('title')
+        return Widget.objects.live().order_by('title')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -217,15 +261,11 @@ class WidgetEditView(LoginRequiredMixin, UpdateView):
     slug_url_kwarg = 'slug'
     success_url = reverse_lazy('users:widget_list')
 
-class WidgetDeleteView(LoginRequiredMixin, DeleteView):
+class WidgetDeleteView(LoginRequiredMixin, BackgroundDeleteMixin, DeleteView):
     model = Widget
     slug_url_kwarg = 'slug'
     success_url = reverse_lazy('users:widget_list')
-
-    def get(self, request, *args, **kwargs):
-        self.object = self.get_object()
-        self.object.delete()
-        return redirect(self.success_url)
+    kind = 'widget'
 
 class PostListByWidgetView(LoginRequiredMixin, ListView):
     model = WidgetPost
@@ -234,13 +274,47 @@ class PostListByWidgetView(LoginRequiredMixin, ListView):
 
     def get_queryset(self):
         self.widget = get_object_or_404(Widget, slug=self.kwargs['widget_slug'])
-        return WidgetPost.objects.filter(widget=self.widget).order_by('-created_at')
+        return WidgetPost.objects.for_display(self.widget).select_related('author').order_by('-created_at')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['widget'] = self.widget
         return context
 
+class PostSearchView(LoginRequiredMixin, View):
+    """
+    Ranked full-text search over category and widget posts, drafts included,
+    as JSON for the dashboard search box (see users/search.py).
+    Usage: /posts/search/?q=pricing&kind=widget&page=2
+    """
+    paginate_by = 20
+    edit_urls = {'category': 'users:post_edit', 'widget': 'users:widget_post_edit'}
+
+    def get(self, request, *args, **kwargs):
+        kind = request.GET.get('kind') or None
+        if kind is not None and kind not in self.edit_urls:
+            return JsonResponse({'error': "kind must be 'category' or 'widget'."}, status=400)
+
+        query = request.GET.get('q', '')
+        page = Paginator(search_posts(query, kind=kind, published=False), self.paginate_by).get_page(request.GET.get('page'))
+        results = []
+        for post in load_posts(page.object_list):
+            parent = getattr(post, post.parent_field)
+            results.append({
+                'kind': post.parent_field,
+                'parent': parent.title,
+                'title': post.title,
+                'is_published': post.is_published,
+                'edit_url': reverse(self.edit_urls[post.parent_field], args=[parent.slug, post.slug]),
+            })
+        return JsonResponse({
+            'query': query,
+            'count': page.paginator.count,
+            'page': page.number,
+            'num_pages': page.paginator.num_pages,
+            'results': results,
+        })
+
 class WidgetPostCreateView(LoginRequiredMixin, CreateView):
     model = WidgetPost
     form_class = DynamicWidgetPostForm
@@ -325,13 +399,14 @@ class ManageUsersListView(UserPassesTestMixin, ListView):
     context_object_name = 'users'
     
     def test_func(self):
-        return self.request.user.is_authenticated and self.request.user.role is not None
+        return self.request.user.is_authenticated and get_role_permissions(self.request)['role'] is not None
     
     def get_queryset(self):
         user = self.request.user
         if user.is_superuser:
             return CustomUser.objects.all().exclude(pk=user.pk).select_related('role', 'assigned_to')
-        return CustomUser.objects.filter(assigned_to=user).select_related('role', 'assigned_to')
+        # Everyone in the user's reporting line, not just direct reports
+        return user.get_descendants().select_related('role', 'assigned_to')
 
 
 class AdminRegisterUserView(RolePermissionRequiredMixin, CreateView):
@@ -349,6 +424,12 @@ class EditSubordinateView(RolePermissionRequiredMixin, UpdateView):
     required_permission = 'can_assign_staff' 
     success_url = reverse_lazy('users:manage_users')
 
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_superuser:
+            return CustomUser.objects.all()
+        return user.get_descendants()
+
 
 class UserDetailView(UserPassesTestMixin, DetailView):
     model = CustomUser
@@ -396,14 +477,14 @@ class StaffAssignmentView(RolePermissionRequiredMixin, ListView):
     model = CustomUser
     template_name = 'dashboard/staff_assignment.html'
     def get_queryset(self):
-        return CustomUser.objects.filter(assigned_to=self.request.user)
+        return self.request.user.get_descendants().select_related('role', 'assigned_to')
 
 class ManageRolesView(UserPassesTestMixin, ListView):
     model = Role
     template_name = 'roles/manage_roles.html'
     context_object_name = 'roles'
     def test_func(self): return self.request.user.is_superuser
-    def get_queryset(self): return Role.objects.annotate(user_count=Count('users'))
+    def get_queryset(self): return Role.objects.all()
 
 class RoleCreateView(UserPassesTestMixin, CreateView):
     model = Role
@@ -462,6 +543,19 @@ class SiteSettingsUpdateView(UserPassesTestMixin, FormView):
         return super().form_valid(form)
 
 
+class CacheStatsView(UserPassesTestMixin, View):
+    """Hit/miss counters for the public page cache, for checking hit rate under load."""
+    def test_func(self): return self.request.user.is_superuser
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({
+            'content_version': get_content_version(),
+            'page_cache': get_hit_stats('page'),
+            # Counted per worker process, so this only covers the worker that answered
+            'app_settings': get_settings_usage(),
+        })
+
+
 class CustomPasswordChangeView(LoginRequiredMixin, FormView):
     template_name = 'registration/password_change_form.html'
     success_url = reverse_lazy('users:login')
@@ -588,23 +682,24 @@ class BroadcastCreateView(LoginRequiredMixin, CreateView):
             audience = request.GET.get('audience')
             emails = set()
 
-            if audience == 'is_manager':
-                emails.update(CustomUser.objects.filter(is_manager=True, is_active=True).values_list('email', flat=True))
-            elif audience == 'super_admin':
-                emails.update(CustomUser.objects.filter(is_superuser=True, is_active=True).values_list('email', flat=True))
-            elif audience == 'administrator':
-                emails.update(CustomUser.objects.filter(is_staff=True, is_active=True).values_list('email', flat=True))
-            elif audience == 'clients':
-                emails.update(CustomUser.objects.filter(role__name__iexact='Clients', is_active=True).values_list('email', flat=True))
-            elif audience == 'staff_only':
-                emails.update(CustomUser.objects.filter(role__name__iexact='Staff', is_active=True).values_list('email', flat=True))
-            elif audience == 'external_only':
-                emails.update(ExternalSubscriber.objects.values_list('email', flat=True))
-            elif audience == 'all':
-                u_emails = CustomUser.objects.filter(is_active=True).values_list('email', flat=True)
-                e_emails = ExternalSubscriber.objects.values_list('email', flat=True)
-                emails.update(u_emails)
-                emails.update(e_emails)
+            with read_from_replica():
+                if audience == 'is_manager':
+                    emails.update(CustomUser.objects.filter(is_manager=True, is_active=True).values_list('email', flat=True))
+                elif audience == 'super_admin':
+                    emails.update(CustomUser.objects.filter(is_superuser=True, is_active=True).values_list('email', flat=True))
+                elif audience == 'administrator':
+                    emails.update(CustomUser.objects.filter(is_staff=True, is_active=True).values_list('email', flat=True))
+                elif audience == 'clients':
+                    emails.update(CustomUser.objects.filter(role__name__iexact='Clients', is_active=True).values_list('email', flat=True))
+                elif audience == 'staff_only':
+                    emails.update(CustomUser.objects.filter(role__name__iexact='Staff', is_active=True).values_list('email', flat=True))
+                elif audience == 'external_only':
+                    emails.update(ExternalSubscriber.objects.values_list('email', flat=True))
+                elif audience == 'all':
+                    u_emails = CustomUser.objects.filter(is_active=True).values_list('email', flat=True)
+                    e_emails = ExternalSubscriber.objects.values_list('email', flat=True)
+                    emails.update(u_emails)
+                    emails.update(e_emails)
 
             return JsonResponse({'emails': sorted(list(emails))})
 